@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from logging.config import fileConfig
+
+from alembic import context
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, pool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import DATABASE_URL, Base
+# Import models to ensure they are registered with Base
+from app import db_models
+
+config = context.config
+
+# Programmatic callers (seed.py, tests) keep their own logging setup
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+# sqlalchemy.url, when a caller sets it (seed.py, tests), wins over DATABASE_URL
+DATABASE_URL = config.get_main_option("sqlalchemy.url") or DATABASE_URL
+# Schema the app built with create_all before migrations existed
+BASELINE_REVISION = "0001"
+
+logger = logging.getLogger("alembic.env")
+
+
+def adopt_unversioned_schema(connection):
+    """Stamp a database created by the pre-Alembic app as BASELINE_REVISION.
+
+    Such databases have the tables but no alembic_version, so 0001 would
+    fail on "table already exists".
+    """
+    tables = inspect(connection).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        logger.info("Unversioned schema found, stamping it as %s", BASELINE_REVISION)
+        context.get_context().stamp(ScriptDirectory.from_config(config), BASELINE_REVISION)
+
+
+def run_migrations_offline():
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most things in place
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        adopt_unversioned_schema(connection)
+        context.run_migrations()
+
+
+async def run_migrations_online():
+    connectable = create_async_engine(DATABASE_URL, poolclass=pool.NullPool)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
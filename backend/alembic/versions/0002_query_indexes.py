@@ -0,0 +1,52 @@
+"""indexes for leaderboard and session queries
+
+- leaderboard: top-N / rank by score, per-user history, time windows
+- game_sessions: partial index on live sessions, per-user lookup
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_leaderboard_score_created_at",
+        "leaderboard",
+        [sa.text("score DESC"), "created_at"],
+    )
+    op.create_index(
+        "ix_leaderboard_user_id_score",
+        "leaderboard",
+        ["user_id", sa.text("score DESC")],
+    )
+    op.create_index("ix_leaderboard_created_at", "leaderboard", ["created_at"])
+
+    is_active = sa.column("is_active", sa.Boolean())
+    op.create_index(
+        "ix_game_sessions_active_started_at",
+        "game_sessions",
+        ["started_at"],
+        sqlite_where=is_active == sa.true(),
+        postgresql_where=is_active == sa.true(),
+    )
+    op.create_index(
+        "ix_game_sessions_user_id_is_active",
+        "game_sessions",
+        ["user_id", "is_active"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_game_sessions_user_id_is_active", table_name="game_sessions")
+    op.drop_index("ix_game_sessions_active_started_at", table_name="game_sessions")
+    op.drop_index("ix_leaderboard_created_at", table_name="leaderboard")
+    op.drop_index("ix_leaderboard_user_id_score", table_name="leaderboard")
+    op.drop_index("ix_leaderboard_score_created_at", table_name="leaderboard")
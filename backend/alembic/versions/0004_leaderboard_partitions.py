@@ -0,0 +1,124 @@
+"""leaderboard retention: rollup table, monthly partitions on Postgres
+
+- leaderboard_rollups: per-user aggregates of expired entries
+- Postgres only: leaderboard becomes RANGE-partitioned by created_at, one
+  partition per month plus a default partition. The primary key has to
+  include the partition key, so it becomes (id, created_at). Existing rows
+  are copied over.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from datetime import datetime, timedelta, timezone
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+LEADERBOARD_INDEXES = {
+    "ix_leaderboard_score_created_at": "(score DESC, created_at)",
+    "ix_leaderboard_user_id_score": "(user_id, score DESC)",
+    "ix_leaderboard_created_at": "(created_at)",
+}
+# Partitions created up front past the current month; app/retention.py
+# keeps creating them from then on
+PARTITIONS_AHEAD = 2
+
+
+def _months(first: datetime, last: datetime):
+    month = first.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month <= last:
+        following = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        yield month, following
+        month = following
+
+
+def _partition_leaderboard():
+    bind = op.get_bind()
+    op.execute("ALTER TABLE leaderboard RENAME TO leaderboard_unpartitioned")
+    op.execute("ALTER TABLE leaderboard_unpartitioned RENAME CONSTRAINT leaderboard_pkey TO leaderboard_unpartitioned_pkey")
+    for name in LEADERBOARD_INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned")
+
+    op.execute("""
+        CREATE TABLE leaderboard (
+            id VARCHAR NOT NULL,
+            user_id VARCHAR REFERENCES users (id),
+            username VARCHAR NOT NULL,
+            score INTEGER NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    for name, columns in LEADERBOARD_INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON leaderboard {columns}")
+    op.execute("CREATE TABLE leaderboard_default PARTITION OF leaderboard DEFAULT")
+
+    now = datetime.now(timezone.utc)
+    first = bind.execute(sa.text("SELECT min(created_at) FROM leaderboard_unpartitioned")).scalar() or now
+    for start, end in _months(first, now + timedelta(days=31 * PARTITIONS_AHEAD)):
+        op.execute(
+            f"CREATE TABLE leaderboard_p{start.year:04d}_{start.month:02d} PARTITION OF leaderboard "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+    op.execute("""
+        INSERT INTO leaderboard (id, user_id, username, score, created_at)
+        SELECT id, user_id, username, score, COALESCE(created_at, now()) FROM leaderboard_unpartitioned
+    """)
+    op.execute("DROP TABLE leaderboard_unpartitioned")
+
+
+def _unpartition_leaderboard():
+    op.execute("ALTER TABLE leaderboard RENAME TO leaderboard_partitioned")
+    op.execute("ALTER TABLE leaderboard_partitioned RENAME CONSTRAINT leaderboard_pkey TO leaderboard_partitioned_pkey")
+    for name in LEADERBOARD_INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+    op.execute("""
+        CREATE TABLE leaderboard (
+            id VARCHAR NOT NULL PRIMARY KEY,
+            user_id VARCHAR REFERENCES users (id),
+            username VARCHAR NOT NULL,
+            score INTEGER NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    for name, columns in LEADERBOARD_INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON leaderboard {columns}")
+    op.execute("INSERT INTO leaderboard SELECT id, user_id, username, score, created_at FROM leaderboard_partitioned")
+    # Drops every partition with it
+    op.execute("DROP TABLE leaderboard_partitioned")
+
+
+def upgrade():
+    op.create_table(
+        "leaderboard_rollups",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("games", sa.Integer(), nullable=False),
+        sa.Column("total_score", sa.BigInteger(), nullable=False),
+        sa.Column("best_score", sa.Integer(), nullable=False),
+        sa.Column("best_entry_id", sa.String(), nullable=False),
+        sa.Column("best_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("first_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index(
+        "ix_leaderboard_rollups_best_score",
+        "leaderboard_rollups",
+        [sa.text("best_score DESC")],
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        _partition_leaderboard()
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        _unpartition_leaderboard()
+    op.drop_index("ix_leaderboard_rollups_best_score", table_name="leaderboard_rollups")
+    op.drop_table("leaderboard_rollups")
@@ -0,0 +1,36 @@
+"""per-player running stats
+
+Filled incrementally by submit_score / end_session; existing history is
+loaded with `python -m app.player_stats`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("games_played", sa.Integer(), nullable=False),
+        sa.Column("total_score", sa.BigInteger(), nullable=False),
+        sa.Column("best_score", sa.Integer(), nullable=False),
+        sa.Column("recent_scores", sa.JSON(), nullable=False),
+        sa.Column("sessions_played", sa.Integer(), nullable=False),
+        sa.Column("playtime_seconds", sa.Float(), nullable=False),
+        sa.Column("last_played_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("user_stats")
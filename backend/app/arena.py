@@ -0,0 +1,357 @@
+"""
+Multiplayer arena rooms with an authoritative server-side tick loop.
+
+Many snakes share one grid. Cells are addressed by a single index
+(`y * width + x`) and the room keeps an occupancy grid (a bytearray with the
+number of snake segments in each cell), so a collision check is one lookup
+per snake instead of comparing every head against every segment.
+
+Each room runs its own asyncio task at a fixed tick rate. After every tick
+one compact frame is JSON-encoded once and fanned out to all subscribers:
+
+    {"type": "frame", "t": tick,
+     "m": [[snakeId, newHeadCell, tailDropped], ...],   # moves
+     "d": [snakeId, ...],                               # died this tick
+     "j": [[snakeId, username, [cells...]], ...],        # joined this tick
+     "f": [cell, ...], "e": [cell, ...]}                 # food added / eaten
+
+Clients apply a frame in this order: remove "d", apply "m", add "j", then
+remove "e" and add "f". A snake's join carries its body as of the end of
+the tick it joined on, so it has no entry in "m" or "d" for that tick.
+
+New subscribers first receive a full {"type": "state"} message, without
+snakes that joined after the last tick (the next frame's "j" adds them). A
+subscriber that falls too far behind gets its backlog replaced by a fresh
+state message instead of blocking the tick loop.
+"""
+from collections import Counter, deque
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+ARENA_WIDTH = int(os.getenv("ARENA_WIDTH", "64"))
+ARENA_HEIGHT = int(os.getenv("ARENA_HEIGHT", "64"))
+ARENA_TICK_RATE = float(os.getenv("ARENA_TICK_RATE", "10"))
+ARENA_MAX_PLAYERS = int(os.getenv("ARENA_MAX_PLAYERS", "64"))
+ARENA_MAX_ROOMS = int(os.getenv("ARENA_MAX_ROOMS", "50"))
+# Rooms with no snakes and no subscribers shut down after this many seconds
+ARENA_IDLE_TIMEOUT = float(os.getenv("ARENA_IDLE_TIMEOUT", "60"))
+SUBSCRIBER_BACKLOG = 32
+
+DIRECTIONS = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+INITIAL_LENGTH = 3
+
+
+class RoomFullError(Exception):
+    pass
+
+
+class ArenaSnake:
+    __slots__ = ("id", "user_id", "username", "body", "direction", "next_direction", "grow", "score")
+
+    def __init__(self, snake_id: int, user_id: str, username: str, body: deque, direction: str):
+        self.id = snake_id
+        self.user_id = user_id
+        self.username = username
+        self.body = body  # head first
+        self.direction = direction
+        self.next_direction = direction
+        self.grow = 0
+        self.score = 0
+
+
+class ArenaRoom:
+    def __init__(
+        self,
+        room_id: str,
+        width: int = ARENA_WIDTH,
+        height: int = ARENA_HEIGHT,
+        tick_rate: float = ARENA_TICK_RATE,
+        max_players: int = ARENA_MAX_PLAYERS,
+        seed: int | None = None,
+    ):
+        self.id = room_id
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.max_players = max_players
+        self.occupancy = bytearray(width * height)
+        self.food: set[int] = set()
+        self.snakes: dict[int, ArenaSnake] = {}
+        self.by_user: dict[str, int] = {}
+        self.tick = 0
+        self.subscribers: set[asyncio.Queue] = set()
+        self._ids = itertools.count(1)
+        self._joined: list[ArenaSnake] = []
+        self._random = random.Random(seed)
+        self._task: asyncio.Task | None = None
+        # Tick timing, in seconds
+        self.last_tick_time = 0.0
+        self.max_tick_time = 0.0
+        self.total_tick_time = 0.0
+        self._refill_food()
+
+    # -- players -----------------------------------------------------------
+
+    def join(self, user_id: str, username: str) -> ArenaSnake:
+        existing = self.by_user.get(user_id)
+        if existing in self.snakes:
+            return self.snakes[existing]
+        if len(self.snakes) >= self.max_players:
+            raise RoomFullError(self.id)
+
+        w = self.width
+        for _ in range(100):
+            direction = self._random.choice(tuple(DIRECTIONS))
+            dx, dy = DIRECTIONS[direction]
+            x = self._random.randrange(INITIAL_LENGTH, self.width - INITIAL_LENGTH)
+            y = self._random.randrange(INITIAL_LENGTH, self.height - INITIAL_LENGTH)
+            # Body trails behind the head, away from the direction of travel
+            cells = [(y - dy * i) * w + (x - dx * i) for i in range(INITIAL_LENGTH)]
+            if not any(self.occupancy[c] or c in self.food for c in cells):
+                break
+        else:
+            raise RoomFullError(self.id)
+
+        snake = ArenaSnake(next(self._ids), user_id, username, deque(cells), direction)
+        for c in cells:
+            self.occupancy[c] += 1
+        self.snakes[snake.id] = snake
+        self.by_user[user_id] = snake.id
+        self._joined.append(snake)
+        return snake
+
+    def steer(self, user_id: str, direction: str) -> bool:
+        snake = self.snakes.get(self.by_user.get(user_id))
+        if snake is None or direction not in DIRECTIONS:
+            return False
+        # Compare with the direction actually travelled last tick, so two
+        # quick turns cannot reverse the snake into itself
+        if direction != OPPOSITE[snake.direction]:
+            snake.next_direction = direction
+        return True
+
+    # -- simulation --------------------------------------------------------
+
+    def step(self) -> dict:
+        started = time.perf_counter()
+        self.tick += 1
+        w, h = self.width, self.height
+        occupancy = self.occupancy
+
+        moves: list[tuple[ArenaSnake, int]] = []
+        dead: list[ArenaSnake] = []
+        for snake in self.snakes.values():
+            snake.direction = snake.next_direction
+            dx, dy = DIRECTIONS[snake.direction]
+            head = snake.body[0]
+            x, y = head % w + dx, head // w + dy
+            if 0 <= x < w and 0 <= y < h:
+                moves.append((snake, y * w + x))
+            else:
+                dead.append(snake)
+
+        # Tails leave before heads arrive, so chasing a tail is legal
+        dropped = {}
+        for snake, _ in moves:
+            if snake.grow:
+                snake.grow -= 1
+                dropped[snake.id] = 0
+            else:
+                occupancy[snake.body.pop()] -= 1
+                dropped[snake.id] = 1
+
+        # Snakes that joined since the last tick are announced by "j" with
+        # their body after this move, never in "m" or "d"
+        just_joined = {s.id for s in self._joined}
+        heads = Counter(head for _, head in moves)
+        frame_moves = []
+        eaten = []
+        for snake, head in moves:
+            if occupancy[head] or heads[head] > 1:
+                dead.append(snake)
+                continue
+            snake.body.appendleft(head)
+            occupancy[head] += 1
+            if head in self.food:
+                self.food.discard(head)
+                eaten.append(head)
+                snake.grow += 1
+                snake.score += 1
+            if snake.id not in just_joined:
+                frame_moves.append([snake.id, head, dropped[snake.id]])
+
+        for snake in dead:
+            for c in snake.body:
+                occupancy[c] -= 1
+            del self.snakes[snake.id]
+            if self.by_user.get(snake.user_id) == snake.id:
+                del self.by_user[snake.user_id]
+
+        added = self._refill_food()
+        joined = [[s.id, s.username, list(s.body)] for s in self._joined if s.id in self.snakes]
+        self._joined.clear()
+
+        elapsed = time.perf_counter() - started
+        self.last_tick_time = elapsed
+        self.max_tick_time = max(self.max_tick_time, elapsed)
+        self.total_tick_time += elapsed
+
+        return {
+            "type": "frame",
+            "t": self.tick,
+            "m": frame_moves,
+            "d": [s.id for s in dead if s.id not in just_joined],
+            "j": joined,
+            "f": added,
+            "e": eaten,
+        }
+
+    def _refill_food(self) -> list[int]:
+        target = 3 + len(self.snakes) // 2
+        added = []
+        attempts = 0
+        while len(self.food) < target and attempts < 100:
+            attempts += 1
+            cell = self._random.randrange(self.width * self.height)
+            if not self.occupancy[cell] and cell not in self.food:
+                self.food.add(cell)
+                added.append(cell)
+        return added
+
+    def state(self) -> dict:
+        # Snakes that joined since the last tick come in the next frame's "j"
+        pending = {s.id for s in self._joined}
+        return {
+            "type": "state",
+            "t": self.tick,
+            "w": self.width,
+            "h": self.height,
+            "snakes": [
+                {"id": s.id, "username": s.username, "score": s.score, "body": list(s.body)}
+                for s in self.snakes.values()
+                if s.id not in pending
+            ],
+            "food": list(self.food),
+        }
+
+    # -- broadcasting ------------------------------------------------------
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        queue.put_nowait(_encode(self.state()))
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def broadcast(self, frame: dict):
+        if not self.subscribers:
+            return
+        payload = _encode(frame)
+        resync = None
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and start it over from a full state
+                while not queue.empty():
+                    queue.get_nowait()
+                if resync is None:
+                    resync = _encode(self.state())
+                queue.put_nowait(resync)
+
+    # -- tick loop ---------------------------------------------------------
+
+    async def run(self, idle_timeout: float = ARENA_IDLE_TIMEOUT):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        idle_since = None
+        while True:
+            self.broadcast(self.step())
+
+            if self.snakes or self.subscribers:
+                idle_since = None
+            elif idle_since is None:
+                idle_since = loop.time()
+            elif loop.time() - idle_since > idle_timeout:
+                return
+
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # Overloaded: skip the missed ticks rather than bursting to catch up
+                logger.warning("Arena room %s is %.1f ms behind", self.id, -delay * 1000)
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def start(self, on_exit=None):
+        self._task = asyncio.get_running_loop().create_task(self.run())
+        if on_exit:
+            self._task.add_done_callback(lambda _: on_exit(self))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "width": self.width,
+            "height": self.height,
+            "tickRate": self.tick_rate,
+            "players": len(self.snakes),
+            "maxPlayers": self.max_players,
+            "spectators": len(self.subscribers),
+            "tick": self.tick,
+            "lastTickMs": round(self.last_tick_time * 1000, 3),
+            "maxTickMs": round(self.max_tick_time * 1000, 3),
+            "avgTickMs": round(self.total_tick_time / self.tick * 1000, 3) if self.tick else 0.0,
+        }
+
+
+def _encode(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"))
+
+
+class ArenaManager:
+    def __init__(self, max_rooms: int = ARENA_MAX_ROOMS):
+        self.max_rooms = max_rooms
+        self.rooms: dict[str, ArenaRoom] = {}
+
+    def create_room(self, room_id: str, **options) -> ArenaRoom:
+        if len(self.rooms) >= self.max_rooms:
+            raise RoomFullError("too many rooms")
+        room = ArenaRoom(room_id, **options)
+        self.rooms[room.id] = room
+        room.start(on_exit=self._forget)
+        return room
+
+    def _forget(self, room: ArenaRoom):
+        if self.rooms.get(room.id) is room:
+            del self.rooms[room.id]
+
+    def get(self, room_id: str) -> ArenaRoom | None:
+        return self.rooms.get(room_id)
+
+    async def stop_all(self):
+        for room in list(self.rooms.values()):
+            await room.stop()
+        self.rooms.clear()
+
+
+manager = ArenaManager()
@@ -0,0 +1,294 @@
+"""
+Server-side bot players.
+
+Bots play the same game as the browser client (20x20 board, walls wrap,
++10 per food) on real `game_sessions` rows, so they show up in the
+spectator list and produce realistic write load.
+
+All bots are advanced together once per tick:
+
+1. `choose_directions` decides every bot's move in one batch. Moves follow
+   a BFS distance field toward the bot's food. On this board a field only
+   depends on the food cell, so fields are computed once per cell, cached,
+   and shared by every bot chasing food in the same place.
+2. The moves are applied in memory.
+3. All rows are written in a single transaction: one bulk UPDATE for
+   every bot, plus a fresh session for each bot whose game ended.
+"""
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from array import array
+import asyncio
+import logging
+import os
+import random
+import uuid
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .database import AsyncSessionLocal
+from .db_models import GameSession as SessionDB, User
+from .spectator import hub
+
+logger = logging.getLogger(__name__)
+
+GRID_SIZE = 20
+BOT_TICK_MS = float(os.getenv("BOT_TICK_MS", "150"))
+BOT_USER_ID = "snake-bot"
+MAX_BOTS = int(os.getenv("MAX_BOTS", "200"))
+
+DIRECTIONS = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+INITIAL_SNAKE = ((10, 10), (9, 10), (8, 10))
+INITIAL_FOOD = (15, 15)
+
+
+def _step(x: int, y: int, direction: str, size: int = GRID_SIZE) -> tuple[int, int]:
+    dx, dy = DIRECTIONS[direction]
+    return (x + dx) % size, (y + dy) % size
+
+
+@lru_cache(maxsize=GRID_SIZE * GRID_SIZE)
+def distance_field(food: tuple[int, int], size: int = GRID_SIZE) -> array:
+    """BFS distances from `food` to every cell (index y * size + x), walls wrapping."""
+    field = array("H", [0xFFFF]) * (size * size)
+    fx, fy = food
+    field[fy * size + fx] = 0
+    queue = deque([food])
+    while queue:
+        x, y = queue.popleft()
+        next_distance = field[y * size + x] + 1
+        for direction in DIRECTIONS:
+            nx, ny = _step(x, y, direction, size)
+            if field[ny * size + nx] > next_distance:
+                field[ny * size + nx] = next_distance
+                queue.append((nx, ny))
+    return field
+
+
+class BotGame:
+    __slots__ = ("session_id", "username", "snake", "food", "direction", "score", "version", "game_over")
+
+    def __init__(self, session_id: str, username: str):
+        self.session_id = session_id
+        self.username = username
+        self.snake = deque(INITIAL_SNAKE)
+        self.food = INITIAL_FOOD
+        self.direction = "RIGHT"
+        self.score = 0
+        self.version = 1
+        self.game_over = False
+
+    def advance(self, direction: str, rng: random.Random):
+        """One tick of the browser game's rules (see lib/game/game-engine.ts)."""
+        head = _step(*self.snake[0], direction)
+        self.direction = direction
+        if head in self.snake:
+            self.game_over = True
+            return
+        self.snake.appendleft(head)
+        if head == self.food:
+            self.score += 10
+            self.food = _random_free_cell(self.snake, rng)
+        else:
+            self.snake.pop()
+
+    def state(self) -> dict:
+        return {
+            "snake": [{"x": x, "y": y} for x, y in self.snake],
+            "food": {"x": self.food[0], "y": self.food[1]},
+            "direction": self.direction,
+            "score": self.score,
+        }
+
+
+def _random_free_cell(snake, rng: random.Random) -> tuple[int, int]:
+    occupied = set(snake)
+    for _ in range(100):
+        cell = (rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE))
+        if cell not in occupied:
+            return cell
+    return cell
+
+
+def choose_directions(games: list[BotGame]) -> list[str]:
+    """Pick the next move for every bot in one pass."""
+    moves = []
+    for game in games:
+        field = distance_field(game.food)
+        body = set(game.snake)
+        hx, hy = game.snake[0]
+        best, best_distance = game.direction, None
+        for direction in DIRECTIONS:
+            if direction == OPPOSITE[game.direction]:
+                continue
+            x, y = _step(hx, hy, direction)
+            if (x, y) in body:
+                continue
+            distance = field[y * GRID_SIZE + x]
+            # Ties keep the current heading to avoid zig-zagging
+            if best_distance is None or distance < best_distance or (
+                distance == best_distance and direction == game.direction
+            ):
+                best, best_distance = direction, distance
+        moves.append(best)
+    return moves
+
+
+class BotRunner:
+    def __init__(self, session_factory=AsyncSessionLocal, tick_interval: float = BOT_TICK_MS / 1000):
+        self.session_factory = session_factory
+        self.tick_interval = tick_interval
+        self.games: list[BotGame] = []
+        self.ticks = 0
+        self.games_finished = 0
+        self._rng = random.Random()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, count: int):
+        await self.stop()
+        await self.spawn(count)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def spawn(self, count: int):
+        """Create the bot user (once) and one live session per bot."""
+        async with self.session_factory() as db:
+            await self._ensure_bot_user(db)
+            self.games = [self._new_game(db, n + 1) for n in range(min(count, MAX_BOTS))]
+            await db.commit()
+        for game in self.games:
+            self._announce(game)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.games:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(SessionDB)
+                    .where(SessionDB.id.in_([g.session_id for g in self.games]))
+                    .values(is_active=False)
+                )
+                await db.commit()
+            for game in self.games:
+                hub.record(game.session_id, {"isActive": False})
+            self.games = []
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Bot tick failed")
+            next_tick = max(next_tick + self.tick_interval, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+    async def tick(self):
+        if not self.games:
+            return
+        moves = choose_directions(self.games)
+        for game, move in zip(self.games, moves):
+            game.advance(move, self._rng)
+            game.version += 1
+        self.ticks += 1
+
+        async with self.session_factory() as db:
+            rows = []
+            for game in self.games:
+                row = {"id": game.session_id, "version": game.version, **game.state()}
+                if game.game_over:
+                    row["is_active"] = False
+                rows.append(row)
+            # ORM bulk UPDATE by primary key: one executemany for all bots
+            await db.execute(update(SessionDB), rows)
+
+            for index, game in enumerate(self.games):
+                if game.game_over:
+                    self.games_finished += 1
+                    self.games[index] = self._new_game(db, index + 1)
+            await db.commit()
+
+        for game, row in zip(self.games, rows):
+            if game.session_id != row["id"]:
+                hub.record(row["id"], {"isActive": False, "score": row["score"], "version": row["version"]})
+                self._announce(game)
+            else:
+                changes = {k: v for k, v in row.items() if k != "id"}
+                hub.record(game.session_id, changes)
+
+    def _new_game(self, db, number: int) -> BotGame:
+        game = BotGame(str(uuid.uuid4()), f"Bot {number}")
+        state = game.state()
+        db.add(SessionDB(
+            id=game.session_id,
+            user_id=BOT_USER_ID,
+            username=game.username,
+            score=0,
+            is_active=True,
+            snake=state["snake"],
+            food=state["food"],
+            direction=game.direction,
+            started_at=datetime.now(),
+        ))
+        return game
+
+    def _announce(self, game: BotGame):
+        hub.start(game.session_id, {
+            "id": game.session_id,
+            "userId": BOT_USER_ID,
+            "username": game.username,
+            "isActive": True,
+            "startedAt": datetime.now().isoformat(),
+            "version": game.version,
+            **game.state(),
+        })
+
+    async def _ensure_bot_user(self, db):
+        result = await db.execute(select(User.id).where(User.id == BOT_USER_ID))
+        if result.scalar_one_or_none() is not None:
+            return
+        insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        # A player may already go by "snake-bot", and other workers may be
+        # creating the bot at the same time; neither is an error
+        for username in ("snake-bot", f"snake-bot-{uuid.uuid4().hex[:8]}"):
+            result = await db.execute(
+                insert(User)
+                .values(
+                    id=BOT_USER_ID,
+                    username=username,
+                    email="bots@snake-game.invalid",
+                    # Not a valid bcrypt hash, so nobody can log in as the bot
+                    password_hash="!",
+                )
+                .on_conflict_do_nothing()
+                .returning(User.id)
+            )
+            if result.scalar_one_or_none() is not None:
+                return
+            result = await db.execute(select(User.id).where(User.id == BOT_USER_ID))
+            if result.scalar_one_or_none() is not None:
+                return
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "bots": len(self.games),
+            "ticks": self.ticks,
+            "gamesFinished": self.games_finished,
+            "cachedDistanceFields": distance_field.cache_info().currsize,
+        }
+
+
+runner = BotRunner()
@@ -1,14 +1,31 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import text
+import logging
 import os
+import time
+
+logger = logging.getLogger(__name__)
 
 # Use SQLite for development, but allow Postgres override
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
+DEV_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+DATABASE_URL = os.getenv("DATABASE_URL", DEV_DATABASE_URL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Optional read replica for read-only endpoints
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+READ_DB_POOL_SIZE = int(os.getenv("READ_DB_POOL_SIZE", "10"))
+READ_DB_MAX_OVERFLOW = int(os.getenv("READ_DB_MAX_OVERFLOW", "10"))
+# Fall back to the primary when the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
 
 engine = create_async_engine(
     DATABASE_URL,
     echo=True, # Log SQL queries for debugging
-    future=True
+    future=True,
+    # In-memory SQLite uses a single static connection, which takes no sizing
+    **({} if ":memory:" in DATABASE_URL else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}),
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -19,8 +36,87 @@ AsyncSessionLocal = sessionmaker(
     autocommit=False
 )
 
+read_engine = create_async_engine(
+    READ_DATABASE_URL,
+    echo=True,
+    pool_size=READ_DB_POOL_SIZE,
+    max_overflow=READ_DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+) if READ_DATABASE_URL else None
+
+ReadAsyncSessionLocal = sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False
+) if read_engine else None
+
 Base = declarative_base()
 
+# Postgres standby: seconds since the last replayed transaction, or 0 when
+# everything received has been replayed (an idle primary is not lag)
+POSTGRES_REPLICA_LAG = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """Chooses the session factory for read-only requests.
+
+    Uses the replica while its measured lag is within `max_lag`, otherwise
+    (or when no replica is configured, or it cannot be reached) the
+    primary. Lag is re-measured at most every `check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        primary_factory,
+        replica_factory=None,
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+        check_interval: float = REPLICA_LAG_CHECK_SECONDS,
+    ):
+        self.primary_factory = primary_factory
+        self.replica_factory = replica_factory
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: float | None = None
+        self._checked_at = float("-inf")
+
+    async def measure_lag(self) -> float:
+        async with self.replica_factory() as session:
+            if session.bind.dialect.name == "postgresql":
+                result = await session.execute(POSTGRES_REPLICA_LAG)
+                return float(result.scalar_one())
+            # SQLite and friends have no replication to lag behind
+            await session.execute(text("SELECT 1"))
+            return 0.0
+
+    async def pick(self):
+        if self.replica_factory is None:
+            return self.primary_factory
+
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            # Claim the check first so concurrent requests reuse the last value
+            self._checked_at = now
+            try:
+                self.lag = await self.measure_lag()
+            except Exception:
+                logger.warning("Read replica unreachable, using primary", exc_info=True)
+                self.lag = None
+
+        if self.lag is None or self.lag > self.max_lag:
+            return self.primary_factory
+        return self.replica_factory
+
+
+read_router = ReplicaRouter(AsyncSessionLocal, ReadAsyncSessionLocal)
+
 # Dependency
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -28,3 +124,16 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+# Dependency for handlers that manage their own read session (e.g. streaming)
+async def get_read_session_factory():
+    return await read_router.pick()
+
+# Dependency for read-only handlers; may be served by the replica
+async def get_read_db():
+    session_factory = await get_read_session_factory()
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
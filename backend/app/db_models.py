@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, Float, DateTime, Boolean, JSON, ForeignKey, Index, true
 from sqlalchemy.sql import func
 import uuid
 from .database import Base
@@ -24,6 +24,34 @@ class LeaderboardEntry(Base):
     score = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Top-N (ORDER BY score DESC LIMIT n) and rank (COUNT WHERE score > x)
+        Index("ix_leaderboard_score_created_at", score.desc(), created_at),
+        # Per-user history and personal best
+        Index("ix_leaderboard_user_id_score", user_id, score.desc()),
+        # Time-window scans (recent scores, retention)
+        Index("ix_leaderboard_created_at", created_at),
+    )
+
+class LeaderboardRollup(Base):
+    """Per-user aggregate of leaderboard entries removed by retention (app/retention.py)."""
+    __tablename__ = "leaderboard_rollups"
+
+    user_id = Column(String, primary_key=True)
+    username = Column(String, nullable=False)
+    games = Column(Integer, nullable=False, default=0)
+    total_score = Column(BigInteger, nullable=False, default=0)
+    # The user's best archived entry, still listed on the leaderboard
+    best_score = Column(Integer, nullable=False)
+    best_entry_id = Column(String, nullable=False)
+    best_at = Column(DateTime(timezone=True))
+    first_at = Column(DateTime(timezone=True))
+    last_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_leaderboard_rollups_best_score", best_score.desc()),
+    )
+
 class GameSession(Base):
     __tablename__ = "game_sessions"
 
@@ -37,6 +65,37 @@ class GameSession(Base):
     snake = Column(JSON, nullable=True)
     food = Column(JSON, nullable=True)
     direction = Column(String, default="RIGHT")
+
+    # Optimistic concurrency: bumped by every update, checked against the
+    # version a client last saw so stale ticks are rejected
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Spectator list (WHERE is_active) only ever touches live sessions,
+        # so keep the index partial and small
+        Index(
+            "ix_game_sessions_active_started_at",
+            started_at,
+            sqlite_where=is_active == true(),
+            postgresql_where=is_active == true(),
+        ),
+        Index("ix_game_sessions_user_id_is_active", user_id, is_active),
+    )
+
+class UserStats(Base):
+    """Per-player running totals, updated as games finish (app/player_stats.py)."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(String, primary_key=True)
+    username = Column(String, nullable=False)
+    games_played = Column(Integer, nullable=False, default=0)
+    total_score = Column(BigInteger, nullable=False, default=0)
+    best_score = Column(Integer, nullable=False, default=0)
+    # Scores of the latest games, oldest first
+    recent_scores = Column(JSON, nullable=False, default=list)
+    sessions_played = Column(Integer, nullable=False, default=0)
+    playtime_seconds = Column(Float, nullable=False, default=0)
+    last_played_at = Column(DateTime(timezone=True))
@@ -1,38 +1,146 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
+import os
+import time
+import uuid
 from .database import get_db
 from .db_models import User
 
-SECRET_KEY = "dev-secret-key"
+SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
 ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Shared secret for operator-only features; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 def create_access_token(data: dict):
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
+    to_encode.update({
+        "iat": now,
+        "exp": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        "jti": uuid.uuid4().hex,
+    })
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+
+def is_admin_token(value: str | None) -> bool:
+    # compare_digest only accepts ASCII str; headers can carry any latin-1
+    return bool(ADMIN_TOKEN and value) and hmac.compare_digest(value.encode(), ADMIN_TOKEN.encode())
+
+
+async def require_admin(x_admin_token: str | None = Header(default=None)):
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required",
+        )
+
+
+class VerifiedTokenCache:
+    """Recently verified tokens, so repeated requests skip HMAC and the user SELECT.
+
+    Keyed by SHA-256 digest of the token, bounded LRU, and entries never
+    outlive the token's own `exp`. Revoked token ids are remembered until
+    their tokens would have expired anyway.
+
+    Both live in this process only: with several workers, a token logged
+    out on one keeps working on the others until it expires. Keep
+    ACCESS_TOKEN_EXPIRE_MINUTES short when running more than one worker.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple[User, str, float]]" = OrderedDict()
+        self._revoked: dict[str, float] = {}
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> User | None:
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user, _, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user
+
+    def put(self, token: str, user: User, jti: str, expires_at: float):
+        self._entries[self.digest(token)] = (user, jti, expires_at)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def revoke(self, token: str, jti: str, expires_at: float):
+        self._entries.pop(self.digest(token), None)
+        now = time.time()
+        self._revoked = {j: exp for j, exp in self._revoked.items() if exp > now}
+        self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def clear(self):
+        self._entries.clear()
+        self._revoked.clear()
+
+
+token_cache = VerifiedTokenCache()
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify signature and expiry; raises JWTError on any problem."""
+    payload = jwt.decode(
+        token, SECRET_KEY, algorithms=[ALGORITHM],
+        options={"require_exp": True, "require_sub": True, "require_jti": True},
+    )
+    if token_cache.is_revoked(payload["jti"]):
+        raise JWTError("Token has been revoked")
+    return payload
+
+
+def revoke_access_token(token: str):
+    payload = decode_access_token(token)
+    token_cache.revoke(token, payload["jti"], payload["exp"])
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
+
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
-    
+
     if user is None:
         raise credentials_exception
+
+    token_cache.put(token, user, payload["jti"], payload["exp"])
     return user
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -44,6 +44,22 @@ class LeaderboardEntry(BaseModel):
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
+class PlayerStats(BaseModel):
+    user_id: str = Field(alias="userId")
+    username: str
+    games_played: int = Field(0, alias="gamesPlayed")
+    best_score: int = Field(0, alias="bestScore")
+    average_score: float = Field(0.0, alias="averageScore")
+    sessions_played: int = Field(0, alias="sessionsPlayed")
+    total_playtime_seconds: float = Field(0.0, alias="totalPlaytimeSeconds")
+    recent_scores: List[int] = Field(default_factory=list, alias="recentScores")
+    recent_average: float = Field(0.0, alias="recentAverage")
+    # Recent average minus overall average: positive while improving
+    trend: float = 0.0
+    last_played_at: Optional[datetime] = Field(None, alias="lastPlayedAt")
+
+    model_config = ConfigDict(populate_by_name=True)
+
 class GameSession(BaseModel):
     id: str
     user_id: str = Field(alias="userId")
@@ -54,9 +70,27 @@ class GameSession(BaseModel):
     food: Optional[Position] = None
     direction: Direction
     started_at: datetime = Field(alias="startedAt")
+    version: int = 1
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
+class SessionKeyframe(BaseModel):
+    seq: int
+    state: GameSession
+
+class SessionDelta(BaseModel):
+    seq: int
+    changes: Dict[str, Any]
+
+class SpectatorSnapshot(BaseModel):
+    session_id: str = Field(alias="sessionId")
+    seq: int
+    # Absent when the requested `since` is still covered by the delta buffer
+    keyframe: Optional[SessionKeyframe] = None
+    deltas: List[SessionDelta]
+
+    model_config = ConfigDict(populate_by_name=True)
+
 class CreateSessionRequest(BaseModel):
     userId: str # Request inputs usually stay as is, but we can map them in logic
     username: str
@@ -67,6 +101,8 @@ class UpdateSessionRequest(BaseModel):
     food: Optional[Position] = None
     direction: Optional[Direction] = None
     is_active: Optional[bool] = Field(default=None, alias="isActive")
+    # Version the client last saw; the update is rejected if it is stale
+    version: Optional[int] = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -77,3 +113,47 @@ class SubmitScoreRequest(BaseModel):
     userId: str
     username: str
     score: int
+
+class CreateArenaRoomRequest(BaseModel):
+    width: int = Field(default=64, ge=16, le=256)
+    height: int = Field(default=64, ge=16, le=256)
+    tick_rate: float = Field(default=10, gt=0, le=60, alias="tickRate")
+    max_players: int = Field(default=64, ge=1, le=256, alias="maxPlayers")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class ArenaRoom(BaseModel):
+    id: str
+    width: int
+    height: int
+    tick_rate: float = Field(alias="tickRate")
+    players: int
+    max_players: int = Field(alias="maxPlayers")
+    spectators: int
+    tick: int
+    last_tick_ms: float = Field(alias="lastTickMs")
+    max_tick_ms: float = Field(alias="maxTickMs")
+    avg_tick_ms: float = Field(alias="avgTickMs")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class JoinArenaResponse(BaseModel):
+    room_id: str = Field(alias="roomId")
+    snake_id: int = Field(alias="snakeId")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class SteerRequest(BaseModel):
+    direction: Direction
+
+class StartBotsRequest(BaseModel):
+    count: int = Field(ge=1, le=200)
+
+class BotStatus(BaseModel):
+    running: bool
+    bots: int
+    ticks: int
+    games_finished: int = Field(alias="gamesFinished")
+    cached_distance_fields: int = Field(alias="cachedDistanceFields")
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,205 @@
+"""
+Per-player statistics.
+
+`user_stats` keeps one row of running totals per player, so
+GET /users/{id}/stats is a single primary-key read instead of an aggregate
+over the player's whole history. submit_score adds each finished game
+(count, total, best, the last RECENT_GAMES scores) and end_session adds the
+session's playtime, each as a single upsert inside the request's own
+transaction.
+
+Existing history (leaderboard, leaderboard_rollups, game_sessions) is
+loaded once with `python -m app.player_stats`, a batch of users per
+transaction. Rows are rebuilt from scratch, so re-running is safe; games
+finished while a batch is being rebuilt can be missed, so run it before
+traffic reaches the stats endpoint or re-run it afterwards.
+"""
+from datetime import datetime
+import argparse
+import asyncio
+import logging
+import os
+from sqlalchemy import JSON, case, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import JSONB, insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .database import AsyncSessionLocal
+from .db_models import GameSession, LeaderboardEntry, LeaderboardRollup, User, UserStats
+
+RECENT_GAMES = int(os.getenv("STATS_RECENT_GAMES", "10"))
+BACKFILL_BATCH_SIZE = int(os.getenv("STATS_BACKFILL_BATCH", "500"))
+
+
+def _empty(user_id: str, username: str) -> dict:
+    return {
+        "user_id": user_id,
+        "username": username,
+        "games_played": 0,
+        "total_score": 0,
+        "best_score": 0,
+        "recent_scores": [],
+        "sessions_played": 0,
+        "playtime_seconds": 0.0,
+        "last_played_at": None,
+    }
+
+
+def _append_recent(dialect: str, old, new):
+    """SQL for `old` JSON array + `new` one-element array, keeping the last RECENT_GAMES."""
+    if dialect == "postgresql":
+        appended = cast(old, JSONB).op("||")(cast(new, JSONB))
+        trimmed = case(
+            (func.jsonb_array_length(appended) > RECENT_GAMES, appended.op("-")(literal_column("0"))),
+            else_=appended,
+        )
+        return cast(trimmed, JSON)
+    appended = func.json_insert(old, "$[#]", func.json_extract(new, "$[0]"))
+    return case(
+        (func.json_array_length(appended) > RECENT_GAMES, func.json_remove(appended, "$[0]")),
+        else_=appended,
+    )
+
+
+async def _upsert(db, values: dict, updates):
+    # One INSERT ... ON CONFLICT DO UPDATE: a player's first game can't race
+    # another into a duplicate key, and concurrent games of one player add
+    # up inside the database instead of overwriting each other
+    dialect = db.bind.dialect.name
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    table = UserStats.__table__
+    stmt = insert(table).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_=updates(stmt.excluded, table.c, dialect),
+    )
+    await db.execute(stmt)
+
+
+async def record_game(db, user_id: str, username: str, score: int, played_at: datetime):
+    """Count one finished game; committed with the caller's transaction."""
+    values = {
+        **_empty(user_id, username),
+        "games_played": 1,
+        "total_score": score,
+        "best_score": score,
+        "recent_scores": [score],
+        "last_played_at": played_at,
+    }
+    await _upsert(db, values, lambda new, old, dialect: {
+        "username": new.username,
+        "games_played": old.games_played + 1,
+        "total_score": old.total_score + new.total_score,
+        "best_score": case((new.best_score > old.best_score, new.best_score), else_=old.best_score),
+        "recent_scores": _append_recent(dialect, old.recent_scores, new.recent_scores),
+        "last_played_at": new.last_played_at,
+    })
+
+
+async def record_playtime(db, user_id: str, username: str, seconds: float):
+    """Add one ended session's playtime; committed with the caller's transaction."""
+    values = {**_empty(user_id, username), "sessions_played": 1, "playtime_seconds": seconds}
+    await _upsert(db, values, lambda new, old, dialect: {
+        "sessions_played": old.sessions_played + 1,
+        "playtime_seconds": old.playtime_seconds + new.playtime_seconds,
+    })
+
+
+def elapsed_seconds(started_at: datetime | None, ended_at: datetime | None = None) -> float:
+    if started_at is None:
+        return 0.0
+    # Same clock as the stored value: naive on SQLite, UTC-aware on Postgres
+    ended_at = ended_at or datetime.now(started_at.tzinfo)
+    return max((ended_at - started_at).total_seconds(), 0.0)
+
+
+def summary(stats: UserStats) -> dict:
+    average = stats.total_score / stats.games_played if stats.games_played else 0.0
+    recent = stats.recent_scores or []
+    recent_average = sum(recent) / len(recent) if recent else 0.0
+    return {
+        "user_id": stats.user_id,
+        "username": stats.username,
+        "games_played": stats.games_played,
+        "best_score": stats.best_score,
+        "average_score": round(average, 2),
+        "sessions_played": stats.sessions_played,
+        "total_playtime_seconds": round(stats.playtime_seconds, 3),
+        "recent_scores": recent,
+        "recent_average": round(recent_average, 2),
+        "trend": round(recent_average - average, 2),
+        "last_played_at": stats.last_played_at,
+    }
+
+
+async def _rebuild(db, users) -> list[dict]:
+    rows = {user_id: _empty(user_id, username) for user_id, username in users}
+    user_ids = list(rows)
+
+    # Games already folded away by leaderboard retention
+    result = await db.execute(select(LeaderboardRollup).where(LeaderboardRollup.user_id.in_(user_ids)))
+    for rollup in result.scalars():
+        row = rows[rollup.user_id]
+        row["games_played"] += rollup.games
+        row["total_score"] += rollup.total_score
+        row["best_score"] = max(row["best_score"], rollup.best_score)
+        row["last_played_at"] = rollup.last_at
+
+    # Retained games, oldest first so the last ones seen are the most recent
+    result = await db.execute(
+        select(LeaderboardEntry.user_id, LeaderboardEntry.score, LeaderboardEntry.created_at)
+        .where(LeaderboardEntry.user_id.in_(user_ids))
+        .order_by(LeaderboardEntry.created_at)
+    )
+    for user_id, score, created_at in result:
+        row = rows[user_id]
+        row["games_played"] += 1
+        row["total_score"] += score
+        row["best_score"] = max(row["best_score"], score)
+        row["recent_scores"] = (row["recent_scores"] + [score])[-RECENT_GAMES:]
+        row["last_played_at"] = created_at
+
+    # Ended sessions; updated_at is when the session ended
+    result = await db.execute(
+        select(GameSession.user_id, GameSession.started_at, GameSession.updated_at)
+        .where(GameSession.user_id.in_(user_ids), GameSession.is_active == False)
+    )
+    for user_id, started_at, updated_at in result:
+        row = rows[user_id]
+        row["sessions_played"] += 1
+        if updated_at is not None:
+            row["playtime_seconds"] += elapsed_seconds(started_at, updated_at)
+
+    return list(rows.values())
+
+
+async def backfill(session_factory=AsyncSessionLocal, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Rebuild user_stats for every user from history, `batch_size` users per transaction."""
+    total = 0
+    last_id = None
+    while True:
+        async with session_factory() as db:
+            query = select(User.id, User.username).order_by(User.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            users = (await db.execute(query)).all()
+            if not users:
+                return total
+
+            rows = await _rebuild(db, users)
+            insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(UserStats.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserStats.__table__.c.user_id],
+                set_={name: stmt.excluded[name] for name in rows[0] if name != "user_id"},
+            )
+            await db.execute(stmt, rows)
+            await db.commit()
+        last_id = users[-1].id
+        total += len(users)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild user_stats from leaderboard and session history.")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(f"Rebuilt stats for {asyncio.run(backfill(batch_size=args.batch_size))} users")
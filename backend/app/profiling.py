@@ -0,0 +1,234 @@
+"""
+Opt-in profiling for production latency investigations.
+
+Enable with PROFILING_ENABLED=true. Then:
+
+- Requests that carry an `X-Profile: <ADMIN_TOKEN>` header, and a
+  PROFILE_SAMPLE_RATE share of requests whose path starts with one of
+  PROFILE_ROUTES (comma separated), are run under a sampling profiler.
+  Samples are written in collapsed-stack format (one
+  `frame;frame;frame count` line per stack) to PROFILE_OUTPUT_DIR, ready for
+  flamegraph.pl / speedscope / inferno. The file name is returned in the
+  `X-Profile-File` response header.
+- At most PROFILE_MAX_CONCURRENT requests are profiled at once, and route
+  profiling stops after PROFILE_MAX_FILES files per process, so pointing it
+  at a hot route (say /sessions, one request per game tick) stays bounded.
+- An event-loop lag monitor measures how late a periodic timer wakes up.
+- PROFILE_SLOW_CALLBACK_MS turns on asyncio debug mode so callbacks that
+  block the loop for longer are logged and counted. Debug mode has real
+  overhead; only set it while investigating.
+
+The sampler runs in a thread and samples the event loop thread, so
+concurrent requests being served by the same loop show up in each other's
+profiles.
+"""
+from collections import Counter
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from .dependencies import is_admin_token
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_ROUTES = [p for p in os.getenv("PROFILE_ROUTES", "").split(",") if p]
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "./profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+# Share of PROFILE_ROUTES requests that are profiled
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "1"))
+# Route profiles written per process before route profiling stops
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "50"))
+PROFILE_SLOW_CALLBACK_MS = os.getenv("PROFILE_SLOW_CALLBACK_MS")
+
+PROFILE_HEADER = b"x-profile"
+
+
+class StackSampler:
+    """Periodically captures the stack of one thread and counts collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+profiles = Counter()
+
+
+def _should_profile(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER and is_admin_token(value.decode("latin-1")):
+            return True
+    if not any(scope["path"].startswith(route) for route in PROFILE_ROUTES):
+        return False
+    if profiles["route_files"] >= PROFILE_MAX_FILES or random.random() >= PROFILE_SAMPLE_RATE:
+        return False
+    profiles["route_files"] += 1
+    return True
+
+
+def _profile_path(scope) -> str:
+    route = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 1_000_000_000:09d}-{scope['method']}-{route}.collapsed"
+    return os.path.join(PROFILE_OUTPUT_DIR, name)
+
+
+class ProfilingMiddleware:
+    """Run selected HTTP requests under a StackSampler."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not PROFILING_ENABLED or scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if profiles["active"] >= PROFILE_MAX_CONCURRENT:
+            profiles["skipped"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        path = _profile_path(scope)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", os.path.basename(path).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+        profiles["active"] += 1
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            # Joining the sampler thread blocks, so keep it off the loop
+            await asyncio.to_thread(sampler.stop)
+            os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+            await asyncio.to_thread(sampler.write, path)
+            profiles["active"] -= 1
+
+
+class _SlowCallbackCounter(logging.Handler):
+    """Counts asyncio's 'Executing <Handle> took N seconds' debug warnings."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        if record.getMessage().startswith("Executing"):
+            self.count += 1
+
+
+class LoopMonitor:
+    """Measures event-loop lag: how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float, warn_after: float):
+        self.interval = interval
+        self.warn_after = warn_after
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.lag_warnings = 0
+        self.slow_callbacks: _SlowCallbackCounter | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if PROFILE_SLOW_CALLBACK_MS:
+            loop.set_debug(True)
+            loop.slow_callback_duration = float(PROFILE_SLOW_CALLBACK_MS) / 1000
+            self.slow_callbacks = _SlowCallbackCounter()
+            logging.getLogger("asyncio").addHandler(self.slow_callbacks)
+        self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.slow_callbacks:
+            logging.getLogger("asyncio").removeHandler(self.slow_callbacks)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.warn_after:
+                self.lag_warnings += 1
+                logger.warning("Event loop lagged %.1f ms", lag * 1000)
+
+    def metrics(self) -> dict:
+        return {
+            "loopLagMs": round(self.last_lag * 1000, 3),
+            "maxLoopLagMs": round(self.max_lag * 1000, 3),
+            "loopLagWarnings": self.lag_warnings,
+            "slowCallbacks": self.slow_callbacks.count if self.slow_callbacks else 0,
+        }
+
+
+loop_monitor = LoopMonitor(LOOP_LAG_INTERVAL_MS / 1000, LOOP_LAG_WARN_MS / 1000)
+
+
+def start():
+    if PROFILING_ENABLED:
+        loop_monitor.start()
+
+
+async def stop():
+    await loop_monitor.stop()
+
+
+def metrics() -> dict:
+    return {
+        "enabled": PROFILING_ENABLED,
+        "activeProfiles": profiles["active"],
+        "routeProfilesWritten": profiles["route_files"],
+        "profilesSkipped": profiles["skipped"],
+        **loop_monitor.metrics(),
+    }
@@ -0,0 +1,201 @@
+"""
+In-process rate limiting and admission control.
+
+- Token buckets keyed by user id (authenticated routes) or client IP
+  (login/signup), one limiter per route policy.
+- A global concurrency gate that sheds requests with 503 once too many are
+  in flight, before they queue up on the database pool. By default the
+  limit is the primary pool's size plus overflow.
+
+Client IPs are taken from X-Forwarded-For only when the connection comes
+from one of TRUSTED_PROXIES, so clients can't pick their own bucket.
+
+State lives in this process only; with several workers each one enforces
+its own limits.
+"""
+from collections import Counter, OrderedDict
+import ipaddress
+import os
+import time
+from fastapi import Depends, HTTPException, Request, status
+from starlette.responses import JSONResponse
+from .database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from .db_models import User
+from .dependencies import get_current_user
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+# Addresses or networks of the reverse proxies in front of the API
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip())
+    for proxy in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+    if proxy.strip()
+]
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketLimiter:
+    """Token buckets refilling at `rate` tokens/second up to `capacity`.
+
+    Buckets are kept in LRU order. A bucket idle long enough to have
+    refilled completely carries no information and is dropped; `max_keys`
+    caps memory when many distinct keys are active at once.
+    """
+
+    def __init__(self, rate: float, capacity: int, max_keys: int = 10_000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._refill_time = capacity / rate
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Take one token for `key`. Returns 0 if allowed, else seconds until a token is available."""
+        if now is None:
+            now = time.monotonic()
+        self._evict_idle(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(self.capacity, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+    def _evict_idle(self, now: float):
+        # Oldest buckets sit at the front; stop at the first one still refilling
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < self._refill_time:
+                break
+            del self._buckets[key]
+
+    def reset(self):
+        self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# Per-route policies: (tokens per second, burst capacity)
+POLICIES = {
+    # bcrypt makes every attempt expensive
+    "login": TokenBucketLimiter(rate=10 / 60, capacity=10),
+    "signup": TokenBucketLimiter(rate=5 / 60, capacity=10),
+    # Game ticks arrive every ~100-150ms while playing
+    "session_tick": TokenBucketLimiter(rate=20, capacity=40),
+    "session_write": TokenBucketLimiter(rate=1, capacity=10),
+}
+
+rejections = Counter()
+gate = Counter()
+
+
+def _check(policy: str, key: str):
+    if not RATE_LIMIT_ENABLED:
+        return
+    retry_after = POLICIES[policy].acquire(key)
+    if retry_after:
+        rejections[policy] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
+
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    host = request.client.host if request.client else "unknown"
+    if not _trusted(host):
+        return host
+    # Each proxy appends the address it received the request from; the
+    # nearest hop that isn't one of ours is the client
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _trusted(hop):
+            return hop
+    return forwarded[0] if forwarded else host
+
+
+def rate_limit_by_ip(policy: str):
+    async def dependency(request: Request):
+        _check(policy, client_ip(request))
+    return dependency
+
+
+def rate_limit_by_user(policy: str):
+    async def dependency(current_user: User = Depends(get_current_user)):
+        _check(policy, current_user.id)
+    return dependency
+
+
+class ConcurrencyLimitMiddleware:
+    """Reject HTTP requests with 503 while `max_in_flight` are already being served."""
+
+    def __init__(self, app, max_in_flight: int = MAX_IN_FLIGHT):
+        self.app = app
+        self.max_in_flight = max_in_flight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        if gate["in_flight"] >= self.max_in_flight:
+            gate["shed"] += 1
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        gate["in_flight"] += 1
+        gate["peak_in_flight"] = max(gate["peak_in_flight"], gate["in_flight"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate["in_flight"] -= 1
+
+
+def metrics() -> dict:
+    return {
+        "rejected": {policy: rejections[policy] for policy in POLICIES},
+        "tracked_keys": {policy: len(limiter) for policy, limiter in POLICIES.items()},
+        "in_flight": gate["in_flight"],
+        "peak_in_flight": gate["peak_in_flight"],
+        "shed": gate["shed"],
+    }
+
+
+def reset():
+    for limiter in POLICIES.values():
+        limiter.reset()
+    rejections.clear()
+    gate["shed"] = 0
+    gate["peak_in_flight"] = gate["in_flight"]
@@ -0,0 +1,320 @@
+"""
+Leaderboard retention.
+
+Every game over appends to `leaderboard`, so left alone the table (and the
+top-N and rank queries that read it) grows forever. Retention keeps it to a
+fixed window: entries older than LEADERBOARD_RETENTION_DAYS are folded into
+one `leaderboard_rollups` row per user (games, total score, first/last
+played, best entry) and removed. The leaderboard router reads both tables,
+so a player's archived best still ranks.
+
+On Postgres `leaderboard` is range-partitioned by month (migration 0004).
+Expired partitions are rolled up and dropped whole, so retention works in
+whole months there, and partitions for the coming months are created ahead
+of time. Rows that landed in the default partition, and tables that are not
+partitioned (SQLite, or databases created by create_all), are rolled up and
+deleted in batches along ix_leaderboard_created_at.
+
+Run it from cron with `python -m app.retention`, or set
+LEADERBOARD_RETENTION_INTERVAL to run it inside the API processes.
+Overlapping runs don't count anything twice: rows are rolled up from what
+each run's own DELETE ... RETURNING removed, and a partition by the run
+that locks it first (the other finds it gone and skips it).
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import logging
+import os
+import re
+from sqlalchemy import case, delete, select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+from .database import AsyncSessionLocal
+from .db_models import LeaderboardEntry, LeaderboardRollup
+
+logger = logging.getLogger(__name__)
+
+# 0 keeps every entry
+RETENTION_DAYS = int(os.getenv("LEADERBOARD_RETENTION_DAYS", "0"))
+# Seconds between in-process runs; 0 leaves it to cron
+RETENTION_INTERVAL = float(os.getenv("LEADERBOARD_RETENTION_INTERVAL", "0"))
+RETENTION_BATCH_SIZE = int(os.getenv("LEADERBOARD_RETENTION_BATCH", "5000"))
+PARTITIONS_AHEAD = int(os.getenv("LEADERBOARD_PARTITIONS_AHEAD", "2"))
+
+PARTITION_NAME = re.compile(r"^leaderboard_p(\d{4})_(\d{2})$")
+ENTRY_COLUMNS = (
+    LeaderboardEntry.id,
+    LeaderboardEntry.user_id,
+    LeaderboardEntry.username,
+    LeaderboardEntry.score,
+    LeaderboardEntry.created_at,
+)
+
+
+def month_start(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"leaderboard_p{month.year:04d}_{month.month:02d}"
+
+
+def aggregate(rows, into: dict | None = None) -> dict:
+    """Fold (id, user_id, username, score, created_at) rows into one rollup row per user."""
+    rollups = {} if into is None else into
+    for entry_id, user_id, username, score, created_at in rows:
+        # user_id is nullable on leaderboard, the rollup key is not
+        key = user_id or ""
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollups[key] = {
+                "user_id": key,
+                "username": username,
+                "games": 1,
+                "total_score": score,
+                "best_score": score,
+                "best_entry_id": entry_id,
+                "best_at": created_at,
+                "first_at": created_at,
+                "last_at": created_at,
+            }
+            continue
+        rollup["games"] += 1
+        rollup["total_score"] += score
+        if score > rollup["best_score"]:
+            rollup.update(best_score=score, best_entry_id=entry_id, best_at=created_at)
+        if created_at is not None:
+            if rollup["first_at"] is None or created_at < rollup["first_at"]:
+                rollup["first_at"] = created_at
+            if rollup["last_at"] is None or created_at > rollup["last_at"]:
+                rollup.update(last_at=created_at, username=username)
+    return rollups
+
+
+async def merge_rollups(db, rollups: dict):
+    """Add freshly aggregated rows onto the stored rollups (one upsert per user)."""
+    if not rollups:
+        return
+    insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    table = LeaderboardRollup.__table__
+    stmt = insert(table)
+    new, old = stmt.excluded, table.c
+    newer_best = new.best_score > old.best_score
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[old.user_id],
+        set_={
+            "username": new.username,
+            "games": old.games + new.games,
+            "total_score": old.total_score + new.total_score,
+            "best_score": case((newer_best, new.best_score), else_=old.best_score),
+            "best_entry_id": case((newer_best, new.best_entry_id), else_=old.best_entry_id),
+            "best_at": case((newer_best, new.best_at), else_=old.best_at),
+            "first_at": case(
+                (old.first_at.is_(None) | (new.first_at < old.first_at), new.first_at),
+                else_=old.first_at,
+            ),
+            "last_at": case(
+                (old.last_at.is_(None) | (new.last_at > old.last_at), new.last_at),
+                else_=old.last_at,
+            ),
+        },
+    )
+    await db.execute(stmt, list(rollups.values()))
+
+
+async def expire_rows(session_factory, cutoff: datetime, batch_size: int = RETENTION_BATCH_SIZE) -> int:
+    """Roll up and delete entries older than `cutoff`, oldest first, one batch per transaction."""
+    total = 0
+    while True:
+        async with session_factory() as db:
+            oldest = (
+                select(LeaderboardEntry.id)
+                .where(LeaderboardEntry.created_at < cutoff)
+                .order_by(LeaderboardEntry.created_at)
+                .limit(batch_size)
+            )
+            # Only rows this DELETE removed are rolled up, so a concurrent
+            # run can't count the same batch. The created_at bound lets
+            # Postgres prune partitions.
+            rows = (await db.execute(
+                delete(LeaderboardEntry)
+                .where(LeaderboardEntry.created_at < cutoff, LeaderboardEntry.id.in_(oldest))
+                .returning(*ENTRY_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )).all()
+            if not rows:
+                await db.rollback()
+                return total
+            await merge_rollups(db, aggregate(rows))
+            await db.commit()
+        total += len(rows)
+
+
+async def _is_partitioned(db) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    result = await db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('leaderboard'))"
+    ))
+    return result.scalar_one()
+
+
+async def _partitions(db) -> dict[str, datetime]:
+    """Monthly partitions of `leaderboard`, name -> first day of the month."""
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('leaderboard')"
+    ))
+    months = {}
+    for (name,) in result:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[name] = datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+    return months
+
+
+async def create_partitions(session_factory, now: datetime, ahead: int = PARTITIONS_AHEAD) -> int:
+    async with session_factory() as db:
+        existing = await _partitions(db)
+    created = 0
+    for offset in range(ahead + 1):
+        start = add_months(month_start(now), offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        async with session_factory() as db:
+            try:
+                await db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF leaderboard "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+                ))
+                await db.commit()
+                created += 1
+            except DBAPIError:
+                # The default partition already holds rows for this month;
+                # they stay there and are expired row by row
+                logger.warning("Could not create leaderboard partition %s", name, exc_info=True)
+    return created
+
+
+async def drop_expired_partitions(session_factory, cutoff: datetime) -> tuple[int, int]:
+    """Roll up and drop every monthly partition that ends at or before `cutoff`."""
+    async with session_factory() as db:
+        partitions = await _partitions(db)
+    dropped = rows = 0
+    for name, month in sorted(partitions.items(), key=lambda item: item[1]):
+        if add_months(month, 1) > cutoff:
+            continue
+        async with session_factory() as db:
+            # `name` comes from the catalog and matched PARTITION_NAME. The
+            # lock keeps a concurrent run out until this one has dropped it
+            try:
+                await db.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+            except DBAPIError:
+                logger.info("Leaderboard partition %s already dropped by another run", name)
+                continue
+            result = await db.stream(
+                text(f"SELECT id, user_id, username, score, created_at FROM {name}")
+                .execution_options(yield_per=RETENTION_BATCH_SIZE)
+            )
+            rollups = {}
+            async for batch in result.partitions():
+                aggregate(batch, rollups)
+                rows += len(batch)
+            await merge_rollups(db, rollups)
+            await db.execute(text(f"DROP TABLE {name}"))
+            await db.commit()
+        dropped += 1
+    return dropped, rows
+
+
+async def run_retention(session_factory=AsyncSessionLocal, retention_days: int = RETENTION_DAYS, now: datetime | None = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    stats = {"partitionsCreated": 0, "partitionsDropped": 0, "rowsRolledUp": 0}
+    async with session_factory() as db:
+        partitioned = await _is_partitioned(db)
+    if partitioned:
+        stats["partitionsCreated"] = await create_partitions(session_factory, now)
+    if retention_days <= 0:
+        return stats
+
+    cutoff = now - timedelta(days=retention_days)
+    if partitioned:
+        # Whole months only: a partly expired month waits until all of it is
+        cutoff = month_start(cutoff)
+        stats["partitionsDropped"], stats["rowsRolledUp"] = await drop_expired_partitions(session_factory, cutoff)
+    stats["rowsRolledUp"] += await expire_rows(session_factory, cutoff)
+    return stats
+
+
+class RetentionJob:
+    def __init__(self, session_factory=AsyncSessionLocal, interval: float = RETENTION_INTERVAL):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.runs = 0
+        self.last_run_at: datetime | None = None
+        self.last_result: dict = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                self.last_result = await run_retention(self.session_factory)
+                self.runs += 1
+                self.last_run_at = datetime.now(timezone.utc)
+            except Exception:
+                logger.exception("Leaderboard retention failed")
+            await asyncio.sleep(self.interval)
+
+    def metrics(self) -> dict:
+        return {
+            "retentionDays": RETENTION_DAYS,
+            "runs": self.runs,
+            "lastRunAt": self.last_run_at.isoformat() if self.last_run_at else None,
+            **self.last_result,
+        }
+
+
+job = RetentionJob()
+
+
+def start():
+    if RETENTION_INTERVAL > 0:
+        job.start()
+
+
+async def stop():
+    await job.stop()
+
+
+def metrics() -> dict:
+    return job.metrics()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll up and remove expired leaderboard entries.")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="retention window (0 only maintains partitions)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(run_retention(retention_days=args.days)))
@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from typing import List
+from jose import JWTError
+from ..models import ArenaRoom as ArenaRoomModel, CreateArenaRoomRequest, JoinArenaResponse, SteerRequest
+from ..db_models import User
+from ..dependencies import get_current_user, decode_access_token
+from ..rate_limit import rate_limit_by_user
+from ..arena import manager, RoomFullError, ArenaRoom
+import asyncio
+import uuid
+
+router = APIRouter(prefix="/arena", tags=["Arena"])
+
+def _get_room(room_id: str) -> ArenaRoom:
+    room = manager.get(room_id)
+    if room is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
+        )
+    return room
+
+@router.get("/rooms", response_model=List[ArenaRoomModel])
+async def list_rooms():
+    return [room.summary() for room in manager.rooms.values()]
+
+@router.post(
+    "/rooms",
+    response_model=ArenaRoomModel,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit_by_user("session_write"))],
+)
+async def create_room(
+    request: CreateArenaRoomRequest,
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        room = manager.create_room(
+            str(uuid.uuid4()),
+            width=request.width,
+            height=request.height,
+            tick_rate=request.tick_rate,
+            max_players=request.max_players,
+        )
+    except RoomFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No arena capacity left"
+        )
+    return room.summary()
+
+@router.get("/rooms/{room_id}", response_model=ArenaRoomModel)
+async def get_room(room_id: str):
+    return _get_room(room_id).summary()
+
+@router.post("/rooms/{room_id}/join", response_model=JoinArenaResponse)
+async def join_room(room_id: str, current_user: User = Depends(get_current_user)):
+    room = _get_room(room_id)
+    try:
+        snake = room.join(current_user.id, current_user.username)
+    except RoomFullError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Room is full"
+        )
+    return {"roomId": room.id, "snakeId": snake.id}
+
+@router.post(
+    "/rooms/{room_id}/direction",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(rate_limit_by_user("session_tick"))],
+)
+async def steer(room_id: str, request: SteerRequest, current_user: User = Depends(get_current_user)):
+    if not _get_room(room_id).steer(current_user.id, request.direction.value):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not playing in this room"
+        )
+
+@router.websocket("/rooms/{room_id}/ws")
+async def room_stream(websocket: WebSocket, room_id: str, token: str | None = None):
+    """Stream frames to spectators and players.
+
+    Players pass their access token as `?token=` and may then send
+    "UP" / "DOWN" / "LEFT" / "RIGHT" text messages to steer.
+    """
+    room = manager.get(room_id)
+    if room is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    user_id = None
+    if token:
+        try:
+            user_id = decode_access_token(token)["sub"]
+        except JWTError:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+    await websocket.accept()
+    queue = room.subscribe()
+
+    async def receive_steering():
+        try:
+            while True:
+                direction = await websocket.receive_text()
+                if user_id:
+                    room.steer(user_id, direction.strip().upper())
+        except WebSocketDisconnect:
+            pass
+
+    receiver = asyncio.create_task(receive_steering())
+    try:
+        while not receiver.done():
+            get_frame = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({get_frame, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if get_frame not in done:
+                get_frame.cancel()
+                break
+            await websocket.send_text(get_frame.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        room.unsubscribe(queue)
+        receiver.cancel()
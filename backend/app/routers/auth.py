@@ -5,7 +5,8 @@ from passlib.context import CryptContext
 from ..models import LoginRequest, SignupRequest, AuthResponse, User as UserModel
 from ..db_models import User as UserDB
 from ..database import get_db
-from ..dependencies import create_access_token, get_current_user
+from ..dependencies import create_access_token, get_current_user, oauth2_scheme, revoke_access_token
+from ..rate_limit import rate_limit_by_ip
 from datetime import datetime
 import uuid
 
@@ -18,7 +19,7 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-@router.post("/login", response_model=AuthResponse)
+@router.post("/login", response_model=AuthResponse, dependencies=[Depends(rate_limit_by_ip("login"))])
 async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(UserDB).where(UserDB.email == request.email))
     user = result.scalar_one_or_none()
@@ -29,10 +30,15 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
             detail="Invalid credentials",
         )
     
-    token = create_access_token(data={"sub": user.id})
+    token = create_access_token(data={"sub": user.id, "username": user.username})
     return {"user": user, "token": token}
 
-@router.post("/signup", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/signup",
+    response_model=AuthResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit_by_ip("signup"))],
+)
 async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(UserDB).where(UserDB.email == request.email))
     if result.scalar_one_or_none():
@@ -52,11 +58,15 @@ async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
     await db.commit()
     await db.refresh(new_user)
     
-    token = create_access_token(data={"sub": new_user.id})
+    token = create_access_token(data={"sub": new_user.id, "username": new_user.username})
     return {"user": new_user, "token": token}
 
 @router.post("/logout")
-async def logout(current_user: UserDB = Depends(get_current_user)):
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: UserDB = Depends(get_current_user)
+):
+    revoke_access_token(token)
     return {"message": "Successfully logged out"}
 
 @router.get("/me", response_model=UserModel)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from ..models import StartBotsRequest, BotStatus
+from ..dependencies import require_admin
+from ..bots import runner
+
+router = APIRouter(prefix="/bots", tags=["Bots"], dependencies=[Depends(require_admin)])
+
+@router.get("", response_model=BotStatus)
+async def get_bots():
+    return runner.status()
+
+@router.post("/start", response_model=BotStatus)
+async def start_bots(request: StartBotsRequest):
+    await runner.start(request.count)
+    return runner.status()
+
+@router.post("/stop", response_model=BotStatus)
+async def stop_bots():
+    await runner.stop()
+    return runner.status()
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from enum import Enum
+from sqlalchemy import select
+from ..database import get_read_session_factory
+from ..db_models import LeaderboardEntry, GameSession
+from ..dependencies import require_admin
+import csv
+import io
+import json
+import zlib
+
+router = APIRouter(prefix="/admin/export", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+EXPORT_TABLES = {
+    "leaderboard": LeaderboardEntry.__table__,
+    "game_sessions": GameSession.__table__,
+}
+BATCH_SIZE = 5000
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+def _to_text(value):
+    # JSON columns (snake, food) as JSON, datetimes as ISO 8601
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"))
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def _encode_ndjson(columns, rows) -> str:
+    return "".join(
+        json.dumps({c: v for c, v in zip(columns, row)}, default=_to_text, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _encode_csv(columns, rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_to_text(v) for v in row] for row in rows)
+    return buffer.getvalue()
+
+async def _export_rows(session_factory, table, fmt: ExportFormat, compress: bool):
+    columns = [c.name for c in table.columns]
+    encode = _encode_ndjson if fmt == ExportFormat.ndjson else _encode_csv
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    if fmt == ExportFormat.csv:
+        yield emit(_encode_csv(columns, [columns]))
+
+    # The session (and its read transaction) lives exactly as long as the
+    # stream; rows arrive through a server-side cursor in BATCH_SIZE chunks
+    async with session_factory() as session:
+        result = await session.stream(
+            select(*table.columns).execution_options(yield_per=BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            chunk = emit(encode(columns, rows))
+            if chunk:
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+@router.get("/{table_name}")
+async def export_table(
+    table_name: str,
+    format: ExportFormat = ExportFormat.ndjson,
+    gzip: bool = False,
+    session_factory = Depends(get_read_session_factory)
+):
+    table = EXPORT_TABLES.get(table_name)
+    if table is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown table"
+        )
+
+    filename = f"{table_name}.{format.value}" + (".gz" if gzip else "")
+    if gzip:
+        media_type = "application/gzip"
+    elif format == ExportFormat.csv:
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        _export_rows(session_factory, table, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -3,39 +3,58 @@ from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 from ..models import LeaderboardEntry as LeaderboardModel, SubmitScoreRequest
-from ..db_models import LeaderboardEntry as LeaderboardDB, User
-from ..database import get_db
+from ..db_models import LeaderboardEntry as LeaderboardDB, LeaderboardRollup, User
+from ..database import get_db, get_read_db
 from ..dependencies import get_current_user
+from ..rate_limit import rate_limit_by_user
+from .. import player_stats
 from datetime import datetime
 import uuid
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
 @router.get("", response_model=List[LeaderboardModel])
-async def get_leaderboard(limit: int = 10, db: AsyncSession = Depends(get_db)):
+async def get_leaderboard(limit: int = 10, db: AsyncSession = Depends(get_read_db)):
+    # Entries still in the retention window, plus each player's best entry
+    # from before it (app/retention.py). Both reads walk a score index for
+    # at most `limit` rows, however much history has accumulated.
     result = await db.execute(
         select(LeaderboardDB).order_by(desc(LeaderboardDB.score)).limit(limit)
     )
-    entries = result.scalars().all()
-    
-    # Calculate rank dynamically (simple index + 1 for now)
-    # Ideally should use window functions but this is enough for list display
+    entries = [
+        (entry.score, entry.id, entry.user_id, entry.username, entry.created_at)
+        for entry in result.scalars().all()
+    ]
+    result = await db.execute(
+        select(LeaderboardRollup).order_by(desc(LeaderboardRollup.best_score)).limit(limit)
+    )
+    entries += [
+        (rollup.best_score, rollup.best_entry_id, rollup.user_id, rollup.username, rollup.best_at)
+        for rollup in result.scalars().all()
+    ]
+    entries.sort(key=lambda entry: entry[0], reverse=True)
+
+    # Rank is the position in the list (ties are not collapsed)
     response_entries = []
-    for index, entry in enumerate(entries):
-        rank = index + 1
+    for index, (score, entry_id, user_id, username, created_at) in enumerate(entries[:limit]):
         # Pydantic model expects snake_case internals but will output camelCase
         response_entries.append(LeaderboardModel(
-            id=entry.id,
-            user_id=entry.user_id,
-            username=entry.username,
-            score=entry.score,
-            created_at=entry.created_at,
-            rank=rank
+            id=entry_id,
+            user_id=user_id,
+            username=username,
+            score=score,
+            created_at=created_at,
+            rank=index + 1
         ))
     
     return response_entries
 
-@router.post("", response_model=LeaderboardModel, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=LeaderboardModel,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit_by_user("session_write"))],
+)
 async def submit_score(
     request: SubmitScoreRequest,
     current_user: User = Depends(get_current_user),
@@ -49,15 +68,21 @@ async def submit_score(
         created_at=datetime.now()
     )
     db.add(entry)
+    # Stats belong to whoever is signed in, whatever userId the body names
+    await player_stats.record_game(db, current_user.id, current_user.username, entry.score, entry.created_at)
     await db.commit()
     await db.refresh(entry)
     
     # Calculate rank
-    # Count how many scores are strictly greater
+    # Count how many scores are strictly greater, among retained entries and
+    # archived personal bests
     rank_query = await db.execute(
         select(func.count(LeaderboardDB.id)).where(LeaderboardDB.score > request.score)
     )
-    rank = rank_query.scalar_one() + 1
+    archived_query = await db.execute(
+        select(func.count()).select_from(LeaderboardRollup).where(LeaderboardRollup.best_score > request.score)
+    )
+    rank = rank_query.scalar_one() + archived_query.scalar_one() + 1
     
     return LeaderboardModel(
         id=entry.id,
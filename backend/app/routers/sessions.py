@@ -1,26 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from ..models import (
     GameSession as SessionModel, CreateSessionRequest, UpdateSessionRequest, 
-    EndSessionRequest, Position, Direction
+    EndSessionRequest, Position, Direction, SpectatorSnapshot
 )
 from ..db_models import GameSession as SessionDB, User
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..dependencies import get_current_user
+from ..rate_limit import rate_limit_by_user
+from ..spectator import hub
+from .. import player_stats
 from datetime import datetime
-from fastapi.encoders import jsonable_encoder
 import uuid
 
 router = APIRouter(prefix="/sessions", tags=["Game Sessions"])
 
+def _session_state(session: SessionDB) -> dict:
+    return SessionModel.model_validate(session).model_dump(mode="json", by_alias=True)
+
 @router.get("", response_model=List[SessionModel])
-async def get_active_sessions(db: AsyncSession = Depends(get_db)):
+async def get_active_sessions(db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(SessionDB).where(SessionDB.is_active == True))
     return result.scalars().all()
 
-@router.post("", response_model=SessionModel, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=SessionModel,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit_by_user("session_write"))],
+)
 async def create_session(
     request: CreateSessionRequest,
     current_user: User = Depends(get_current_user),
@@ -47,10 +57,11 @@ async def create_session(
     db.add(session)
     await db.commit()
     await db.refresh(session)
+    hub.start(session.id, _session_state(session))
     return session
 
 @router.get("/{session_id}", response_model=SessionModel)
-async def get_session(session_id: str, db: AsyncSession = Depends(get_db)):
+async def get_session(session_id: str, db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(SessionDB).where(SessionDB.id == session_id))
     session = result.scalar_one_or_none()
     
@@ -61,63 +72,111 @@ async def get_session(session_id: str, db: AsyncSession = Depends(get_db)):
         )
     return session
 
-@router.patch("/{session_id}", response_model=SessionModel)
+@router.get("/{session_id}/snapshot", response_model=SpectatorSnapshot)
+async def get_session_snapshot(
+    session_id: str,
+    since: int | None = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Catch a spectator up: deltas after `since`, or the latest keyframe plus deltas."""
+    timeline = hub.get(session_id)
+    if timeline is None:
+        session = await get_session(session_id, db)
+        timeline = hub.start(session.id, _session_state(session))
+    return {"sessionId": session_id, **timeline.snapshot(since)}
+
+@router.patch(
+    "/{session_id}",
+    response_model=SessionModel,
+    dependencies=[Depends(rate_limit_by_user("session_tick"))],
+)
 async def update_session(
     session_id: str,
     updates: UpdateSessionRequest,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(SessionDB).where(SessionDB.id == session_id))
+    # JSON mode gives plain dicts for snake/food and strings for direction,
+    # which is what the JSON columns expect
+    update_data = updates.model_dump(exclude_unset=True, exclude={"version"}, mode="json")
+
+    # Single round trip: UPDATE ... WHERE id = :id [AND version = :version] RETURNING *
+    stmt = (
+        update(SessionDB)
+        .where(SessionDB.id == session_id)
+        .values(**update_data, version=SessionDB.version + 1)
+        .returning(SessionDB)
+        .execution_options(synchronize_session=False)
+    )
+    if updates.version is not None:
+        stmt = stmt.where(SessionDB.version == updates.version)
+
+    result = await db.execute(stmt)
     session = result.scalar_one_or_none()
-    
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Session not found"
-        )
-    
-    update_data = updates.model_dump(exclude_unset=True, by_alias=True)
-    
-    # Manually map specific fields if needed or generic set
-    # Note: alias mapping might produce 'isActive' but DB needs 'is_active'
-    # Our Pydantic model is set to populate_by_name=True, but .model_dump() with by_alias=True uses alias
-    # We should use default names (snake_case) for DB update, so by_alias=False (default is False)
-    # But wait, our Pydantic input model `UpdateSessionRequest` uses snake_case keys `is_active` internally.
-    # So `updates.model_dump(exclude_unset=True)` should give `is_active`.
-    
-    for key, value in update_data.items():
-        if key == 'snake' and value:
-             session.snake = [jsonable_encoder(p) for p in value]
-        elif key == 'food' and value:
-             session.food = jsonable_encoder(value)
-        elif key == 'direction' and value: # Convert Enum to string
-             session.direction = value.value if hasattr(value, 'value') else value
-        else:
-             setattr(session, key, value)
-    
     await db.commit()
-    await db.refresh(session)
+
+    if not session:
+        # Only the failure path pays for telling "missing" from "stale"
+        await _raise_missing_or_stale(db, session_id)
+
+    changes = updates.model_dump(exclude_unset=True, exclude={"version"}, by_alias=True, mode="json")
+    hub.record(session_id, {**changes, "version": session.version})
     return session
 
-@router.post("/{session_id}/end")
+@router.post("/{session_id}/end", dependencies=[Depends(rate_limit_by_user("session_write"))])
 async def end_session(
     session_id: str,
     request: EndSessionRequest,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(SessionDB).where(SessionDB.id == session_id))
-    session = result.scalar_one_or_none()
-    
-    if not session:
+    values = {"is_active": False, "score": request.finalScore, "version": SessionDB.version + 1}
+    # Only the call that actually ends a live session adds its playtime, so
+    # ending it again (e.g. on page unload) is not counted twice
+    result = await db.execute(
+        update(SessionDB)
+        .where(SessionDB.id == session_id, SessionDB.is_active == True)
+        .values(**values)
+        .returning(SessionDB.version, SessionDB.started_at)
+    )
+    ended = result.one_or_none()
+    if ended is not None:
+        version = ended.version
+        # The session's user_id came from the client; credit the signed-in user
+        await player_stats.record_playtime(
+            db, current_user.id, current_user.username, player_stats.elapsed_seconds(ended.started_at)
+        )
+    else:
+        result = await db.execute(
+            update(SessionDB)
+            .where(SessionDB.id == session_id)
+            .values(**values)
+            .returning(SessionDB.version)
+        )
+        version = result.scalar_one_or_none()
+    await db.commit()
+
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
-    
-    session.is_active = False
-    session.score = request.finalScore
-    await db.commit()
+
+    hub.record(session_id, {"isActive": False, "score": request.finalScore, "version": version})
     
     return {"message": "Session ended"}
+
+async def _raise_missing_or_stale(db: AsyncSession, session_id: str):
+    result = await db.execute(select(SessionDB.version).where(SessionDB.id == session_id))
+    version = result.scalar_one_or_none()
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+    # The current version (read on the primary) lets the client retry at
+    # once instead of re-reading a possibly lagging replica
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": "Session has been updated by a newer tick", "version": version}
+    )
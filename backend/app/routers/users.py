@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import PlayerStats
+from ..db_models import User, UserStats
+from ..database import get_read_db
+from .. import player_stats
+
+router = APIRouter(prefix="/users", tags=["Users"])
+
+@router.get("/{user_id}/stats", response_model=PlayerStats)
+async def get_user_stats(user_id: str, db: AsyncSession = Depends(get_read_db)):
+    # One primary-key read; the totals are kept up to date as games finish
+    stats = await db.get(UserStats, user_id)
+    if stats is not None:
+        return PlayerStats(**player_stats.summary(stats))
+
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    # Registered but has not finished a game yet
+    return PlayerStats(user_id=user.id, username=user.username)
@@ -0,0 +1,89 @@
+"""
+Per-session timelines for late-joining spectators.
+
+Every live session keeps a bounded ring buffer of recent state deltas plus
+a keyframe (full state) refreshed every KEYFRAME_INTERVAL deltas. A
+spectator asks for "everything since seq N": if N is still covered by the
+buffer it gets just the missing deltas, otherwise the latest keyframe and
+the deltas after it. Either way the response is small and no database query
+is needed.
+
+Timelines live in this process only and are rebuilt from the database row
+(as a keyframe) when missing, e.g. after a restart.
+"""
+from collections import OrderedDict, deque
+import os
+
+KEYFRAME_INTERVAL = int(os.getenv("SPECTATOR_KEYFRAME_INTERVAL", "20"))
+# Must cover at least one keyframe interval so keyframe + deltas is complete
+DELTA_BUFFER_SIZE = max(int(os.getenv("SPECTATOR_DELTA_BUFFER", "64")), KEYFRAME_INTERVAL)
+MAX_TIMELINES = int(os.getenv("SPECTATOR_MAX_TIMELINES", "1000"))
+
+
+class SessionTimeline:
+    __slots__ = ("seq", "state", "keyframe_seq", "keyframe", "deltas")
+
+    def __init__(self, state: dict):
+        self.seq = 0
+        self.state = dict(state)
+        self.keyframe_seq = 0
+        self.keyframe = dict(state)
+        self.deltas: deque = deque(maxlen=DELTA_BUFFER_SIZE)
+
+    def record(self, changes: dict) -> int:
+        self.seq += 1
+        self.state.update(changes)
+        self.deltas.append((self.seq, changes))
+        if self.seq - self.keyframe_seq >= KEYFRAME_INTERVAL:
+            self.keyframe_seq = self.seq
+            self.keyframe = dict(self.state)
+        return self.seq
+
+    def snapshot(self, since: int | None = None) -> dict:
+        # Deltas after `since` are all still buffered
+        oldest = self.deltas[0][0] if self.deltas else self.seq + 1
+        if since is not None and oldest - 1 <= since <= self.seq:
+            return {
+                "seq": self.seq,
+                "keyframe": None,
+                "deltas": [{"seq": s, "changes": c} for s, c in self.deltas if s > since],
+            }
+        return {
+            "seq": self.seq,
+            "keyframe": {"seq": self.keyframe_seq, "state": self.keyframe},
+            "deltas": [{"seq": s, "changes": c} for s, c in self.deltas if s > self.keyframe_seq],
+        }
+
+
+class SpectatorHub:
+    """Timelines by session id, least recently updated evicted first."""
+
+    def __init__(self, max_timelines: int = MAX_TIMELINES):
+        self.max_timelines = max_timelines
+        self._timelines: "OrderedDict[str, SessionTimeline]" = OrderedDict()
+
+    def start(self, session_id: str, state: dict) -> SessionTimeline:
+        timeline = SessionTimeline(state)
+        self._timelines[session_id] = timeline
+        self._timelines.move_to_end(session_id)
+        if len(self._timelines) > self.max_timelines:
+            self._timelines.popitem(last=False)
+        return timeline
+
+    def record(self, session_id: str, changes: dict):
+        timeline = self._timelines.get(session_id)
+        if timeline is None:
+            # Not seen since this process started; the next spectator
+            # request seeds it from the database
+            return
+        timeline.record(changes)
+        self._timelines.move_to_end(session_id)
+
+    def get(self, session_id: str) -> SessionTimeline | None:
+        return self._timelines.get(session_id)
+
+    def clear(self):
+        self._timelines.clear()
+
+
+hub = SpectatorHub()
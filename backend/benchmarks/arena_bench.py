@@ -0,0 +1,67 @@
+"""
+Arena tick benchmark.
+
+Measures how long one ArenaRoom.step() takes with N snakes that steer
+randomly (dead snakes rejoin so the population stays constant), and from
+that how many rooms a single core can sustain at the configured tick rate.
+Frame encoding is included since every tick pays for it once.
+
+    python -m benchmarks.arena_bench --snakes 50 --ticks 2000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from app.arena import ArenaRoom, DIRECTIONS
+
+
+def run(snakes: int, ticks: int, width: int, height: int, tick_rate: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    room = ArenaRoom("bench", width=width, height=height, tick_rate=tick_rate, max_players=snakes, seed=seed)
+    players = [f"bot-{i}" for i in range(snakes)]
+    directions = tuple(DIRECTIONS)
+
+    durations = []
+    for _ in range(ticks):
+        for player in players:
+            if player not in room.by_user:
+                room.join(player, player)
+            elif rng.random() < 0.2:
+                room.steer(player, rng.choice(directions))
+
+        started = time.perf_counter()
+        frame = room.step()
+        json.dumps(frame, separators=(",", ":"))
+        durations.append(time.perf_counter() - started)
+
+    durations.sort()
+    mean = statistics.fmean(durations)
+    return {
+        "snakes": snakes,
+        "grid": f"{width}x{height}",
+        "ticks": ticks,
+        "mean_tick_ms": round(mean * 1000, 4),
+        "p99_tick_ms": round(durations[int(len(durations) * 0.99) - 1] * 1000, 4),
+        "max_tick_ms": round(durations[-1] * 1000, 4),
+        # One core spends mean * tick_rate seconds per second on each room
+        "rooms_per_core": int(1 / (mean * tick_rate)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snakes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--width", type=int, default=64)
+    parser.add_argument("--height", type=int, default=64)
+    parser.add_argument("--tick-rate", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for snakes in args.snakes:
+        print(json.dumps(run(snakes, args.ticks, args.width, args.height, args.tick_rate, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
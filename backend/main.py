@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, leaderboard, sessions
+from app.routers import auth, leaderboard, sessions, arena, bots, export, users
+from app import rate_limit, profiling, retention
+from app.arena import manager as arena_manager
+from app.bots import runner as bot_runner
+import os
 
 app = FastAPI(
     title="Snake Game API",
@@ -8,15 +12,40 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Create tables on startup
-from app.database import engine, Base
+# Schema is managed by Alembic (`alembic upgrade head`, run by the start
+# scripts). Only the throwaway dev SQLite default is created on the fly.
+from app.database import engine, Base, DATABASE_URL, DEV_DATABASE_URL
 # Import models to ensure they are registered with Base
 from app import db_models
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if DATABASE_URL == DEV_DATABASE_URL:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    profiling.start()
+    # Leaderboard retention in-process (LEADERBOARD_RETENTION_INTERVAL), for
+    # deployments without a cron job
+    retention.start()
+    # Background bot players, e.g. BOT_COUNT=20 for a populated spectator list
+    bot_count = int(os.getenv("BOT_COUNT", "0"))
+    if bot_count:
+        await bot_runner.start(bot_count)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await arena_manager.stop_all()
+    await bot_runner.stop()
+    await profiling.stop()
+    await retention.stop()
+
+# Opt-in request profiling (PROFILING_ENABLED); innermost so it measures the
+# handler rather than rejected requests
+app.add_middleware(profiling.ProfilingMiddleware)
+
+# Shed load before requests pile up on the database pool. Added before CORS
+# so browsers can still read the 503.
+app.add_middleware(rate_limit.ConcurrencyLimitMiddleware)
 
 # CORS configuration
 origins = [
@@ -37,7 +66,19 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(leaderboard.router)
 app.include_router(sessions.router)
+app.include_router(arena.router)
+app.include_router(bots.router)
+app.include_router(export.router)
+app.include_router(users.router)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Snake Game API"}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "rateLimit": rate_limit.metrics(),
+        "profiling": profiling.metrics(),
+        "retention": retention.metrics(),
+    }
@@ -0,0 +1,258 @@
+"""
+Synthetic data seeder for capacity testing.
+
+Generates users, leaderboard entries and game sessions in bulk and loads
+them without going through the API:
+
+- every user shares one password hash computed up front (one bcrypt call
+  instead of one per user), so seeded accounts can log in with --password;
+- SQLite gets multi-row INSERT ... VALUES statements sized to the bound
+  parameter limit, inside one transaction per table;
+- Postgres gets COPY through asyncpg's copy_records_to_table;
+- the schema comes from `alembic upgrade head` (run first), so a fresh
+  database ends up exactly as the app's start scripts would leave it;
+- secondary indexes are dropped before a table is loaded and rebuilt
+  afterwards in the same transaction (one sort instead of millions of
+  random B-tree inserts); pass --keep-indexes to skip this on a database
+  that is serving traffic, since the table stays locked meanwhile.
+
+Examples:
+
+    python seed.py --users 100000
+    DATABASE_URL=postgresql+asyncpg://... python seed.py --users 1000000 --scores-per-user 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database import DATABASE_URL
+from app.db_models import User, LeaderboardEntry, GameSession
+from app.routers.auth import get_password_hash
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER since 3.32
+SQLITE_MAX_VARIABLES = 32766
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+# JSON columns are sent pre-serialized; there are only 400 possible food cells
+INITIAL_SNAKE = json.dumps([{"x": 10, "y": 10}, {"x": 9, "y": 10}, {"x": 8, "y": 10}])
+FOOD_CELLS = [json.dumps({"x": x, "y": y}) for y in range(20) for x in range(20)]
+
+
+class Generator:
+    """Produces rows (as tuples in table column order) in batches.
+
+    Values are already in the form the driver takes, so rows go straight to
+    the database without SQLAlchemy's per-value type processing. SQLite
+    gets timestamps as text in the format SQLAlchemy's DateTime type writes.
+    """
+
+    def __init__(self, args, dialect: str = "sqlite"):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.text_timestamps = dialect == "sqlite"
+        self.now = datetime.now(timezone.utc)
+        if self.text_timestamps:
+            self.now = self.now.replace(tzinfo=None)
+        self.password_hash = get_password_hash(args.password)
+        self.users: list[tuple[str, str]] = []
+
+    def _uuid(self) -> str:
+        # UUID-formatted random hex; ~3x cheaper than building uuid.UUID objects
+        h = "%032x" % self.rng.getrandbits(128)
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def _timestamp(self, offset: float = 0):
+        value = self.now - timedelta(seconds=self.rng.random() * self.args.days * 86400 - offset)
+        return value.isoformat(" ", "microseconds") if self.text_timestamps else value
+
+    def _count(self, mean: float) -> int:
+        # Geometric: most players have a few rows, a long tail has many
+        if mean <= 0:
+            return 0
+        return int(math.log(1 - self.rng.random()) / math.log(1 - 1 / (mean + 1)))
+
+    def _score(self) -> int:
+        if self.args.score_dist == "uniform":
+            raw = self.rng.uniform(0, self.args.max_score)
+        elif self.args.score_dist == "pareto":
+            raw = (self.rng.paretovariate(1.5) - 1) * 50
+        else:
+            raw = self.rng.lognormvariate(4, 1)
+        # The game awards 10 points per food
+        return min(self.args.max_score, int(raw) // 10 * 10)
+
+    def users_batches(self):
+        batch = []
+        for n in range(self.args.users):
+            user_id = self._uuid()
+            username = f"{self.args.prefix}{n:08d}"
+            self.users.append((user_id, username))
+            batch.append((user_id, username, f"{username}@example.com", self.password_hash, self._timestamp()))
+            if len(batch) == self.args.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def leaderboard_batches(self):
+        batch = []
+        for user_id, username in self.users:
+            for _ in range(self._count(self.args.scores_per_user)):
+                batch.append((self._uuid(), user_id, username, self._score(), self._timestamp()))
+                if len(batch) == self.args.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def session_batches(self):
+        batch = []
+        for user_id, username in self.users:
+            for _ in range(self._count(self.args.sessions_per_user)):
+                active = self.rng.random() < self.args.active_fraction
+                # One timestamp draw, then a 10-600 s game length
+                started_at = self.now - timedelta(seconds=self.rng.random() * self.args.days * 86400)
+                updated_at = started_at + timedelta(seconds=self.rng.randrange(10, 600))
+                if self.text_timestamps:
+                    started_at = started_at.isoformat(" ", "microseconds")
+                    updated_at = updated_at.isoformat(" ", "microseconds")
+                batch.append((
+                    self._uuid(), user_id, username,
+                    0 if active else self._score(),
+                    active,
+                    INITIAL_SNAKE, self.rng.choice(FOOD_CELLS), self.rng.choice(DIRECTIONS),
+                    1,
+                    started_at,
+                    updated_at,
+                ))
+                if len(batch) == self.args.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+TABLES = [
+    (User.__table__, ["id", "username", "email", "password_hash", "created_at"], "users_batches"),
+    (LeaderboardEntry.__table__, ["id", "user_id", "username", "score", "created_at"], "leaderboard_batches"),
+    (GameSession.__table__, [
+        "id", "user_id", "username", "score", "is_active",
+        "snake", "food", "direction", "version", "started_at", "updated_at",
+    ], "session_batches"),
+]
+
+
+async def _pipelined(batches, write) -> int:
+    """Write each batch while the next one is generated.
+
+    Generation runs in a worker thread so the event loop stays free to
+    drive the driver; SQLite (in aiosqlite's thread) and asyncpg's socket
+    I/O both release the GIL, so the two overlap.
+    """
+    total = 0
+    pending = None
+    while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+        if pending is not None:
+            await pending
+        pending = asyncio.ensure_future(write(batch))
+        total += len(batch)
+    if pending is not None:
+        await pending
+    return total
+
+
+async def _load_sqlite(conn, table, columns, batches) -> int:
+    await conn.exec_driver_sql("PRAGMA synchronous = OFF")
+    rows_per_statement = SQLITE_MAX_VARIABLES // len(columns)
+    placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+    prefix = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES "
+    full_statement = prefix + ", ".join([placeholders] * rows_per_statement)
+
+    async def write(batch):
+        for start in range(0, len(batch), rows_per_statement):
+            chunk = batch[start:start + rows_per_statement]
+            statement = full_statement if len(chunk) == rows_per_statement else (
+                prefix + ", ".join([placeholders] * len(chunk))
+            )
+            await conn.exec_driver_sql(statement, tuple(v for row in chunk for v in row))
+
+    return await _pipelined(batches, write)
+
+
+async def _load_postgres(conn, table, columns, batches) -> int:
+    raw = (await conn.get_raw_connection()).driver_connection
+
+    async def write(batch):
+        await raw.copy_records_to_table(table.name, records=batch, columns=columns)
+
+    return await _pipelined(batches, write)
+
+
+def migrate(database_url: str):
+    """Bring the database to alembic head, as the app's start scripts do."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    config = Config(os.path.join(here, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(here, "alembic"))
+    # configparser interpolation: a literal % has to be doubled
+    config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+async def seed(args) -> dict:
+    # Migrations run their own event loop, so they get a thread of their own
+    await asyncio.to_thread(migrate, args.database_url)
+    engine = create_async_engine(args.database_url)
+    generator = Generator(args, engine.dialect.name)
+    counts = {}
+    try:
+        for table, columns, batches in TABLES:
+            started = time.perf_counter()
+            async with engine.begin() as conn:
+                indexes = [] if args.keep_indexes else list(table.indexes)
+                for index in indexes:
+                    await conn.run_sync(index.drop, checkfirst=True)
+                load = _load_postgres if engine.dialect.name == "postgresql" else _load_sqlite
+                rows = await load(conn, table, columns, getattr(generator, batches)())
+                for index in indexes:
+                    await conn.run_sync(index.create)
+            elapsed = time.perf_counter() - started
+            counts[table.name] = rows
+            print(f"{table.name}: {rows} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+
+        if engine.dialect.name == "postgresql":
+            async with engine.begin() as conn:
+                for table, _, _ in TABLES:
+                    await conn.execute(text(f"ANALYZE {table.name}"))
+    finally:
+        await engine.dispose()
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--scores-per-user", type=float, default=5, help="mean leaderboard rows per user")
+    parser.add_argument("--sessions-per-user", type=float, default=5, help="mean game sessions per user")
+    parser.add_argument("--active-fraction", type=float, default=0.01, help="share of sessions still active")
+    parser.add_argument("--score-dist", choices=["lognormal", "pareto", "uniform"], default="lognormal")
+    parser.add_argument("--max-score", type=int, default=10_000)
+    parser.add_argument("--days", type=float, default=365, help="spread timestamps over this many days")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--keep-indexes", action="store_true", help="insert into indexed tables as-is")
+    parser.add_argument("--prefix", default="seed", help="username prefix; change it to seed again")
+    parser.add_argument("--password", default="password123", help="password shared by all seeded users")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible data")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(seed(parse_args()))
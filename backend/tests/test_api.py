@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db, get_read_session_factory
 from app import db_models
 
 # Use in-memory SQLite for testing
@@ -25,6 +25,8 @@ async def override_get_db():
         yield session
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_read_session_factory] = lambda: TestingSessionLocal
 
 client = TestClient(app)
 
@@ -151,3 +153,433 @@ def test_game_sessions():
     response = client.get("/sessions")
     active_ids = [s["id"] for s in response.json()]
     assert session_id not in active_ids
+
+def test_session_update_rejects_stale_version():
+    signup_res = client.post("/auth/signup", json={
+        "username": "version_user",
+        "email": "version@example.com",
+        "password": "password123"
+    })
+    headers = {"Authorization": f"Bearer {signup_res.json()['token']}"}
+
+    response = client.post("/sessions", json={
+        "userId": "user1",
+        "username": "version_user"
+    }, headers=headers)
+    session_id = response.json()["id"]
+    assert response.json()["version"] == 1
+
+    # First tick based on version 1 wins and bumps the version
+    response = client.patch(f"/sessions/{session_id}", json={
+        "score": 10, "version": 1
+    }, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    # A tick still based on version 1 is stale
+    response = client.patch(f"/sessions/{session_id}", json={
+        "score": 5, "version": 1
+    }, headers=headers)
+    assert response.status_code == 409
+    assert response.json()["detail"]["version"] == 2
+    assert client.get(f"/sessions/{session_id}").json()["score"] == 10
+
+    response = client.patch("/sessions/missing", json={"score": 1}, headers=headers)
+    assert response.status_code == 404
+
+def test_login_rate_limited_per_ip():
+    from app import rate_limit
+    rate_limit.reset()
+    try:
+        statuses = [
+            client.post("/auth/login", json={
+                "email": "nobody@example.com",
+                "password": "wrong"
+            }).status_code
+            for _ in range(rate_limit.POLICIES["login"].capacity + 1)
+        ]
+        assert statuses[:-1] == [401] * rate_limit.POLICIES["login"].capacity
+        assert statuses[-1] == 429
+
+        response = client.get("/metrics")
+        assert response.json()["rateLimit"]["rejected"]["login"] == 1
+    finally:
+        rate_limit.reset()
+
+def test_client_ip_uses_forwarded_for_only_from_trusted_proxies(monkeypatch):
+    import ipaddress
+    from starlette.requests import Request
+    from app import rate_limit
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", [ipaddress.ip_network("172.28.0.10")])
+
+    def request(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+    assert rate_limit.client_ip(request("172.28.0.10", "203.0.113.7")) == "203.0.113.7"
+    # A client-supplied entry in front of the real one is ignored
+    assert rate_limit.client_ip(request("172.28.0.10", "1.2.3.4, 203.0.113.7")) == "203.0.113.7"
+    assert rate_limit.client_ip(request("172.28.0.10")) == "172.28.0.10"
+    # Clients that reach the API directly can't choose their bucket
+    assert rate_limit.client_ip(request("198.51.100.1", "1.2.3.4")) == "198.51.100.1"
+
+def test_token_bucket_refills_and_evicts_idle_keys():
+    from app.rate_limit import TokenBucketLimiter
+    limiter = TokenBucketLimiter(rate=1, capacity=2)
+    assert limiter.acquire("a", now=0) == 0
+    assert limiter.acquire("a", now=0) == 0
+    assert limiter.acquire("a", now=0) == pytest.approx(1)
+    assert limiter.acquire("a", now=1) == 0
+
+    # "a" has fully refilled by t=10, so it is dropped when "b" arrives
+    limiter.acquire("b", now=10)
+    assert len(limiter) == 1
+
+def test_token_expiry_and_logout_revocation():
+    from jose import jwt
+    from app.dependencies import SECRET_KEY, ALGORITHM
+
+    signup_res = client.post("/auth/signup", json={
+        "username": "token_user",
+        "email": "token@example.com",
+        "password": "password123"
+    })
+    token = signup_res.json()["token"]
+    claims = jwt.get_unverified_claims(token)
+    assert claims["username"] == "token_user"
+    assert claims["exp"] > claims["iat"]
+
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    # Second call is served from the verified-token cache
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+    expired = jwt.encode(
+        {**claims, "exp": claims["iat"] - 60}, SECRET_KEY, algorithm=ALGORITHM
+    )
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {expired}"})
+    assert response.status_code == 401
+
+def test_profiling_header_writes_collapsed_stacks(monkeypatch, tmp_path):
+    from app import dependencies, profiling
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL_MS", 0.1)
+    monkeypatch.setattr(dependencies, "ADMIN_TOKEN", "admin-secret")
+
+    response = client.get("/leaderboard", headers={"X-Profile": "wrong"})
+    assert "x-profile-file" not in response.headers
+    response = client.get("/leaderboard", headers={"X-Profile": "sécret".encode("latin-1")})
+    assert response.status_code == 200
+    assert "x-profile-file" not in response.headers
+
+    response = client.get("/leaderboard", headers={"X-Profile": "admin-secret"})
+    assert response.status_code == 200
+    profile = tmp_path / response.headers["x-profile-file"]
+    lines = profile.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+
+def test_route_profiling_is_sampled_and_capped(monkeypatch, tmp_path):
+    from collections import Counter
+    from app import profiling
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL_MS", 0.1)
+    monkeypatch.setattr(profiling, "PROFILE_ROUTES", ["/leaderboard"])
+    monkeypatch.setattr(profiling, "profiles", Counter())
+
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    for _ in range(3):
+        assert "x-profile-file" not in client.get("/leaderboard").headers
+    assert not list(tmp_path.iterdir())
+
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1)
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+    profiled = [
+        "x-profile-file" in client.get("/leaderboard").headers for _ in range(4)
+    ]
+    assert profiled == [True, True, False, False]
+    assert len(list(tmp_path.iterdir())) == 2
+    assert profiling.metrics()["routeProfilesWritten"] == 2
+    assert profiling.metrics()["activeProfiles"] == 0
+
+def test_spectator_snapshot_catches_up_from_keyframe_and_deltas():
+    signup_res = client.post("/auth/signup", json={
+        "username": "spectated_user",
+        "email": "spectated@example.com",
+        "password": "password123"
+    })
+    headers = {"Authorization": f"Bearer {signup_res.json()['token']}"}
+    session_id = client.post("/sessions", json={
+        "userId": "user1",
+        "username": "spectated_user"
+    }, headers=headers).json()["id"]
+
+    for score in (1, 2, 3):
+        client.patch(f"/sessions/{session_id}", json={"score": score}, headers=headers)
+
+    # Late join: keyframe (initial state) + every delta since
+    snapshot = client.get(f"/sessions/{session_id}/snapshot").json()
+    assert snapshot["seq"] == 3
+    assert snapshot["keyframe"]["state"]["score"] == 0
+    assert [d["changes"]["score"] for d in snapshot["deltas"]] == [1, 2, 3]
+
+    # Already caught up to seq 2: only the missing delta
+    snapshot = client.get(f"/sessions/{session_id}/snapshot", params={"since": 2}).json()
+    assert snapshot["keyframe"] is None
+    assert [d["seq"] for d in snapshot["deltas"]] == [3]
+
+    client.post(f"/sessions/{session_id}/end", json={"finalScore": 3}, headers=headers)
+    snapshot = client.get(f"/sessions/{session_id}/snapshot", params={"since": 3}).json()
+    assert snapshot["deltas"][0]["changes"]["isActive"] is False
+
+def test_session_timeline_falls_back_to_keyframe_when_buffer_overflows():
+    from app.spectator import SessionTimeline, KEYFRAME_INTERVAL, DELTA_BUFFER_SIZE
+    timeline = SessionTimeline({"score": 0})
+    for score in range(1, DELTA_BUFFER_SIZE + KEYFRAME_INTERVAL + 2):
+        timeline.record({"score": score})
+
+    snapshot = timeline.snapshot(since=1)
+    keyframe = snapshot["keyframe"]
+    assert keyframe is not None
+    assert keyframe["state"]["score"] == keyframe["seq"]
+    assert [d["seq"] for d in snapshot["deltas"]] == list(range(keyframe["seq"] + 1, timeline.seq + 1))
+
+def test_bots_drive_real_sessions(monkeypatch):
+    import asyncio
+    from app import bots, dependencies
+    from app.spectator import hub
+
+    assert client.get("/bots").status_code == 403
+    # A player already holding the bot's username doesn't stop the bots
+    assert client.post("/auth/signup", json={
+        "username": "snake-bot",
+        "email": "not-a-bot@example.com",
+        "password": "password123"
+    }).status_code == 201
+
+    runner = bots.BotRunner(TestingSessionLocal)
+    async def play():
+        await runner.spawn(3)
+        for _ in range(40):
+            await runner.tick()
+    asyncio.run(play())
+
+    active = {s["id"]: s for s in client.get("/sessions").json()}
+    for game in runner.games:
+        assert active[game.session_id]["username"] == game.username
+        assert active[game.session_id]["version"] == game.version
+        assert hub.get(game.session_id).seq > 0
+    assert runner.ticks == 40
+
+    # stop() clears runner.games
+    session_ids = {game.session_id for game in runner.games}
+    assert len(session_ids) == 3
+    asyncio.run(runner.stop())
+    active_ids = {s["id"] for s in client.get("/sessions").json()}
+    assert not active_ids & session_ids
+
+    monkeypatch.setattr(dependencies, "ADMIN_TOKEN", "admin-secret")
+    response = client.get("/bots", headers={"X-Admin-Token": "admin-secret"})
+    assert response.status_code == 200
+
+def test_bot_moves_follow_distance_field():
+    from app.bots import BotGame, choose_directions, distance_field
+    game = BotGame("s", "Bot 1")
+    game.food = (10, 5)  # straight up from the head at (10, 10)
+    assert choose_directions([game]) == ["UP"]
+
+    # Walls wrap, so food just across the left edge is 2 steps away
+    assert distance_field((19, 0))[0 * 20 + 1] == 2
+
+def test_export_streams_tables(monkeypatch):
+    import csv, gzip, io, json
+    from app import dependencies
+    from app.routers import export
+    monkeypatch.setattr(dependencies, "ADMIN_TOKEN", "admin-secret")
+    monkeypatch.setattr(export, "BATCH_SIZE", 2)
+    headers = {"X-Admin-Token": "admin-secret"}
+
+    assert client.get("/admin/export/leaderboard").status_code == 403
+    assert client.get("/admin/export/users", headers=headers).status_code == 404
+
+    expected = len(client.get("/leaderboard", params={"limit": 1000}).json())
+    assert expected > 0
+
+    response = client.get("/admin/export/leaderboard", headers=headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == expected
+    assert {"id", "user_id", "username", "score", "created_at"} <= rows[0].keys()
+
+    response = client.get("/admin/export/game_sessions", params={"format": "csv", "gzip": True}, headers=headers)
+    assert response.headers["content-disposition"].endswith('game_sessions.csv.gz"')
+    table = list(csv.reader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert table[0][:3] == ["id", "user_id", "username"]
+    assert len(table) > 1
+    assert json.loads(table[1][table[0].index("snake")])
+
+def test_retention_rolls_up_expired_entries():
+    import asyncio
+    from datetime import datetime, timedelta
+    from sqlalchemy import select, func
+    from app import retention
+    from app.db_models import LeaderboardEntry, LeaderboardRollup
+
+    old = datetime.now() - timedelta(days=400)
+    async def add_history(scores, first_id=0):
+        async with TestingSessionLocal() as db:
+            for n, score in enumerate(scores, start=first_id):
+                db.add(LeaderboardEntry(
+                    id=f"old-{n}", user_id="veteran", username="veteran",
+                    score=score, created_at=old + timedelta(days=n),
+                ))
+            await db.commit()
+
+    async def stored():
+        async with TestingSessionLocal() as db:
+            left = await db.scalar(
+                select(func.count()).select_from(LeaderboardEntry).where(LeaderboardEntry.user_id == "veteran")
+            )
+            return left, await db.get(LeaderboardRollup, "veteran")
+
+    asyncio.run(add_history([5000, 20, 30]))
+    stats = asyncio.run(retention.run_retention(TestingSessionLocal, retention_days=365))
+    assert stats["rowsRolledUp"] == 3
+    left, rollup = asyncio.run(stored())
+    assert left == 0
+    assert (rollup.games, rollup.total_score, rollup.best_score, rollup.best_entry_id) == (3, 5050, 5000, "old-0")
+
+    # The archived best still tops the board and counts towards rank
+    top = client.get("/leaderboard").json()[0]
+    assert (top["id"], top["score"], top["rank"]) == ("old-0", 5000, 1)
+    token = client.post("/auth/signup", json={
+        "username": "retention_user", "email": "retention@example.com", "password": "password123",
+    }).json()["token"]
+    response = client.post("/leaderboard", json={
+        "userId": "retention-uid", "username": "retention_user", "score": 4000,
+    }, headers={"Authorization": f"Bearer {token}"})
+    assert response.json()["rank"] == 2
+
+    # Later runs merge into the stored rollup, batch by batch
+    asyncio.run(add_history([10, 6000, 40], first_id=3))
+    cutoff = datetime.now() - timedelta(days=365)
+    assert asyncio.run(retention.expire_rows(TestingSessionLocal, cutoff, batch_size=2)) == 3
+    left, rollup = asyncio.run(stored())
+    assert left == 0
+    assert (rollup.games, rollup.total_score, rollup.best_score, rollup.best_entry_id) == (6, 11100, 6000, "old-4")
+    assert rollup.first_at < rollup.last_at
+
+def test_overlapping_retention_runs_count_each_row_once(tmp_path):
+    import asyncio
+    from datetime import datetime, timedelta
+    from app import retention
+    from app.db_models import LeaderboardEntry, LeaderboardRollup
+
+    file_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'retention.db'}")
+    FileSession = sessionmaker(file_engine, class_=AsyncSession, expire_on_commit=False)
+    old = datetime.now() - timedelta(days=400)
+
+    async def run():
+        async with file_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with FileSession() as db:
+            for n in range(50):
+                db.add(LeaderboardEntry(id=f"e-{n}", user_id="u", username="u", score=n, created_at=old + timedelta(hours=n)))
+            await db.commit()
+        cutoff = datetime.now() - timedelta(days=365)
+        expired = await asyncio.gather(*(retention.expire_rows(FileSession, cutoff, batch_size=7) for _ in range(3)))
+        async with FileSession() as db:
+            rollup = await db.get(LeaderboardRollup, "u")
+        await file_engine.dispose()
+        return expired, rollup
+
+    expired, rollup = asyncio.run(run())
+    assert sum(expired) == 50
+    assert (rollup.games, rollup.total_score) == (50, sum(range(50)))
+
+def test_player_stats_update_incrementally_and_backfill():
+    import asyncio
+    from sqlalchemy import delete
+    from app import player_stats
+    from app.db_models import UserStats
+
+    response = client.post("/auth/signup", json={
+        "username": "stats_user", "email": "stats@example.com", "password": "password123",
+    })
+    user_id = response.json()["user"]["id"]
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    assert client.get("/users/nobody/stats").status_code == 404
+    fresh = client.get(f"/users/{user_id}/stats").json()
+    assert (fresh["username"], fresh["gamesPlayed"], fresh["recentScores"]) == ("stats_user", 0, [])
+
+    session_id = client.post("/sessions", json={"userId": user_id, "username": "stats_user"}, headers=headers).json()["id"]
+    for score in (100, 20, 60):
+        client.post("/leaderboard", json={"userId": user_id, "username": "stats_user", "score": score}, headers=headers)
+    # Ending twice (game over, then page unload) counts the session once
+    for _ in range(2):
+        assert client.post(f"/sessions/{session_id}/end", json={"finalScore": 60}, headers=headers).status_code == 200
+
+    stats = client.get(f"/users/{user_id}/stats").json()
+    assert (stats["gamesPlayed"], stats["bestScore"], stats["averageScore"]) == (3, 100, 60.0)
+    assert stats["recentScores"] == [100, 20, 60]
+    assert stats["sessionsPlayed"] == 1 and stats["totalPlaytimeSeconds"] >= 0
+    assert stats["trend"] == 0.0 and stats["lastPlayedAt"]
+
+    # The backfill rebuilds the same totals from history, batch by batch
+    async def wipe():
+        async with TestingSessionLocal() as db:
+            await db.execute(delete(UserStats))
+            await db.commit()
+    asyncio.run(wipe())
+    assert client.get(f"/users/{user_id}/stats").json()["gamesPlayed"] == 0
+    assert asyncio.run(player_stats.backfill(TestingSessionLocal, batch_size=2)) >= 1
+    rebuilt = client.get(f"/users/{user_id}/stats").json()
+    for field in ("gamesPlayed", "bestScore", "averageScore", "recentScores", "sessionsPlayed"):
+        assert rebuilt[field] == stats[field], field
+
+def test_player_stats_upsert_keeps_last_recent_games(monkeypatch):
+    import asyncio
+    from datetime import datetime
+    from app import player_stats
+    from app.db_models import UserStats
+    monkeypatch.setattr(player_stats, "RECENT_GAMES", 3)
+
+    async def play():
+        async with TestingSessionLocal() as db:
+            for score in (10, 20, 30, 40, 50):
+                await player_stats.record_game(db, "upsert-user", "upsert_user", score, datetime.now())
+            await player_stats.record_playtime(db, "upsert-user", "upsert_user", 1.5)
+            await player_stats.record_playtime(db, "upsert-user", "upsert_user", 2.0)
+            await db.commit()
+            return await db.get(UserStats, "upsert-user")
+    stats = asyncio.run(play())
+    assert (stats.games_played, stats.total_score, stats.best_score) == (5, 150, 50)
+    assert stats.recent_scores == [30, 40, 50]
+    assert (stats.sessions_played, stats.playtime_seconds) == (2, 3.5)
+
+def test_player_stats_credit_the_signed_in_user():
+    victim = client.post("/auth/signup", json={
+        "username": "stats_victim", "email": "victim@example.com", "password": "password123",
+    }).json()["user"]
+    player = client.post("/auth/signup", json={
+        "username": "stats_player", "email": "player@example.com", "password": "password123",
+    }).json()
+    headers = {"Authorization": f"Bearer {player['token']}"}
+
+    # The body names the victim; only the signed-in player's stats move
+    forged = {"userId": victim["id"], "username": "stats_victim"}
+    session_id = client.post("/sessions", json=forged, headers=headers).json()["id"]
+    client.post("/leaderboard", json={**forged, "score": 500}, headers=headers)
+    client.post(f"/sessions/{session_id}/end", json={"finalScore": 500}, headers=headers)
+
+    assert client.get(f"/users/{victim['id']}/stats").json()["gamesPlayed"] == 0
+    stats = client.get(f"/users/{player['user']['id']}/stats").json()
+    assert (stats["gamesPlayed"], stats["bestScore"], stats["sessionsPlayed"]) == (1, 500, 1)
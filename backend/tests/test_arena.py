@@ -0,0 +1,167 @@
+"""
+Arena engine and router tests.
+
+The engine is exercised tick by tick through ArenaRoom.step(); the router
+runs against a minimal app so room tick loops live on the TestClient's
+event loop for the duration of each test.
+"""
+import json
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.arena import ArenaRoom, ArenaSnake, manager
+from app.db_models import User
+from app.dependencies import create_access_token, get_current_user
+from app.routers import arena
+
+
+def place(room, user_id, cells, direction):
+    """Put a snake at exact cells (head first) instead of a random spawn."""
+    snake = ArenaSnake(len(room.snakes) + 1, user_id, user_id, deque(cells), direction)
+    for c in cells:
+        room.occupancy[c] += 1
+    room.snakes[snake.id] = snake
+    room.by_user[user_id] = snake.id
+    return snake
+
+
+def cell(room, x, y):
+    return y * room.width + x
+
+
+def test_snake_moves_and_occupancy_follows():
+    room = ArenaRoom("r", width=16, height=16, seed=1)
+    room.food.clear()
+    snake = place(room, "a", [cell(room, 5, 5), cell(room, 4, 5), cell(room, 3, 5)], "RIGHT")
+
+    frame = room.step()
+    assert frame["m"] == [[snake.id, cell(room, 6, 5), 1]]
+    assert room.occupancy[cell(room, 6, 5)] == 1
+    assert room.occupancy[cell(room, 3, 5)] == 0
+    assert sum(room.occupancy) == 3
+
+
+def test_head_on_and_body_collisions():
+    room = ArenaRoom("r", width=16, height=16, seed=1)
+    room.food.clear()
+    a = place(room, "a", [cell(room, 4, 5), cell(room, 3, 5)], "RIGHT")
+    b = place(room, "b", [cell(room, 6, 5), cell(room, 7, 5), cell(room, 8, 5)], "LEFT")
+    # c runs into b's body from below
+    c = place(room, "c", [cell(room, 7, 6), cell(room, 7, 7)], "UP")
+
+    frame = room.step()
+    assert sorted(frame["d"]) == sorted([a.id, b.id, c.id])
+    assert not room.snakes
+    assert sum(room.occupancy) == 0
+
+
+def test_walls_kill_and_food_grows():
+    room = ArenaRoom("r", width=16, height=16, seed=1)
+    room.food = {cell(room, 6, 5)}
+    eater = place(room, "a", [cell(room, 5, 5), cell(room, 4, 5)], "RIGHT")
+    walker = place(room, "b", [cell(room, 15, 0), cell(room, 14, 0)], "RIGHT")
+
+    frame = room.step()
+    assert frame["d"] == [walker.id]
+    assert frame["e"] == [cell(room, 6, 5)]
+    assert eater.score == 1
+
+    # The tail stays put for one tick while the snake grows
+    frame = room.step()
+    assert frame["m"] == [[eater.id, cell(room, 7, 5), 0]]
+    assert len(eater.body) == 3
+
+
+def test_joined_snake_is_announced_once_after_its_move():
+    room = ArenaRoom("r", width=16, height=16, seed=1)
+    snake = room.join("a", "a")
+
+    frame = room.step()
+    assert frame["m"] == [] and frame["d"] == []
+    assert frame["j"] == [[snake.id, "a", list(snake.body)]]
+
+    frame = room.step()
+    assert [m[0] for m in frame["m"]] == [snake.id]
+    assert frame["j"] == []
+
+
+def apply(snakes, frame):
+    """Apply a frame to {snakeId: body} the way clients do: d, m, j."""
+    for snake_id in frame["d"]:
+        del snakes[snake_id]
+    for snake_id, head, dropped in frame["m"]:
+        body = snakes[snake_id]
+        snakes[snake_id] = [head] + (body[:-1] if dropped else body)
+    for snake_id, _, body in frame["j"]:
+        assert snake_id not in snakes
+        snakes[snake_id] = body
+
+
+def test_spectator_subscribing_between_join_and_step_stays_in_sync():
+    room = ArenaRoom("r", width=16, height=16, seed=1)
+    room.food.clear()
+    room.join("a", "a")
+    # Moved to the right edge, facing the wall: its first move kills it
+    doomed = room.join("b", "b")
+    for c in doomed.body:
+        room.occupancy[c] -= 1
+    doomed.body = deque([cell(room, 15, 0), cell(room, 14, 0), cell(room, 13, 0)])
+    for c in doomed.body:
+        room.occupancy[c] += 1
+    doomed.direction = doomed.next_direction = "RIGHT"
+
+    state = room.state()
+    assert state["snakes"] == []
+    snakes = {s["id"]: s["body"] for s in state["snakes"]}
+    for _ in range(3):
+        apply(snakes, room.step())
+    assert snakes == {s.id: list(s.body) for s in room.snakes.values()}
+    assert doomed.id not in snakes
+
+
+def test_steering_cannot_reverse():
+    room = ArenaRoom("r", width=16, height=16, seed=1)
+    snake = room.join("a", "a")
+    opposite = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}[snake.direction]
+    assert room.steer("a", opposite)
+    assert snake.next_direction == snake.direction
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await manager.stop_all()
+
+
+def test_rooms_api_and_frame_stream():
+    test_app = FastAPI(lifespan=lifespan)
+    test_app.include_router(arena.router)
+    user = User(id="arena-user", username="arena_user", email="arena@example.com")
+    test_app.dependency_overrides[get_current_user] = lambda: user
+    token = create_access_token({"sub": user.id, "username": user.username})
+
+    with TestClient(test_app) as client:
+        response = client.post("/arena/rooms", json={"width": 32, "height": 32, "tickRate": 50})
+        assert response.status_code == 201
+        room_id = response.json()["id"]
+
+        with client.websocket_connect(f"/arena/rooms/{room_id}/ws?token={token}") as ws:
+            assert json.loads(ws.receive_text())["type"] == "state"
+
+            joined = client.post(f"/arena/rooms/{room_id}/join").json()
+            snake_id = joined["snakeId"]
+
+            frame = json.loads(ws.receive_text())
+            while not frame["j"]:
+                frame = json.loads(ws.receive_text())
+            assert frame["j"][0][0] == snake_id
+
+            frame = json.loads(ws.receive_text())
+            assert frame["type"] == "frame"
+            assert [m[0] for m in frame["m"]] == [snake_id] or frame["d"] == [snake_id]
+
+        summary = client.get(f"/arena/rooms/{room_id}").json()
+        assert summary["tick"] > 0
+        assert summary["avgTickMs"] >= 0
+        assert client.get("/arena/rooms/missing").status_code == 404
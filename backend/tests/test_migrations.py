@@ -0,0 +1,46 @@
+"""
+Alembic migrations against a throwaway SQLite file.
+"""
+import asyncio
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+def alembic_config(url):
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+async def _schema(url):
+    engine = create_async_engine(url)
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda sync: inspect(sync).get_table_names())
+        version = None
+        if "alembic_version" in tables:
+            version = await conn.scalar(text("SELECT version_num FROM alembic_version"))
+    await engine.dispose()
+    return set(tables), version
+
+
+def test_unversioned_baseline_schema_is_stamped_then_upgraded(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'baseline.db'}"
+    config = alembic_config(url)
+    # What the pre-Alembic app left behind: the 0001 tables, no version row
+    command.upgrade(config, "0001")
+
+    async def forget_version():
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE alembic_version"))
+        await engine.dispose()
+    asyncio.run(forget_version())
+
+    command.upgrade(config, "head")
+    tables, version = asyncio.run(_schema(url))
+    assert version == ScriptDirectory.from_config(config).get_current_head()
+    assert {"users", "leaderboard", "game_sessions", "leaderboard_rollups", "user_stats"} <= tables
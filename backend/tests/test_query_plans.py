@@ -0,0 +1,111 @@
+"""
+Query-plan checks for the router queries.
+
+Each query used by the leaderboard and sessions routers must be served by an
+index. On SQLite this is checked with EXPLAIN QUERY PLAN against an in-memory
+database; the Postgres variant runs when DATABASE_URL points at Postgres (as
+in CI), against a scratch database built by the migrations (so it sees the
+partitioned leaderboard), and forbids sequential scans while planning.
+"""
+import asyncio
+import os
+import uuid
+import pytest
+from alembic import command
+from sqlalchemy import make_url, select, func, desc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.db_models import LeaderboardEntry, LeaderboardRollup, GameSession
+from tests.test_migrations import alembic_config
+
+# The statements below mirror the ones issued in app/routers
+QUERIES = {
+    "leaderboard_top_n": select(LeaderboardEntry)
+        .order_by(desc(LeaderboardEntry.score)).limit(10),
+    "leaderboard_rank": select(func.count(LeaderboardEntry.id))
+        .where(LeaderboardEntry.score > 100),
+    "leaderboard_archived_top_n": select(LeaderboardRollup)
+        .order_by(desc(LeaderboardRollup.best_score)).limit(10),
+    "leaderboard_archived_rank": select(func.count()).select_from(LeaderboardRollup)
+        .where(LeaderboardRollup.best_score > 100),
+    "leaderboard_expired": select(LeaderboardEntry.id)
+        .where(LeaderboardEntry.created_at < "2026-01-01")
+        .order_by(LeaderboardEntry.created_at).limit(5000),
+    "leaderboard_by_user": select(LeaderboardEntry)
+        .where(LeaderboardEntry.user_id == "u1")
+        .order_by(desc(LeaderboardEntry.score)),
+    "sessions_active": select(GameSession).where(GameSession.is_active == True),
+    "sessions_by_user": select(GameSession)
+        .where(GameSession.user_id == "u1", GameSession.is_active == True),
+}
+
+
+def _compile(engine, stmt):
+    return str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+async def _sqlite_plans():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    plans = {}
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for name, stmt in QUERIES.items():
+            rows = await conn.execute(text("EXPLAIN QUERY PLAN " + _compile(engine, stmt)))
+            plans[name] = [row[-1] for row in rows]
+    await engine.dispose()
+    return plans
+
+
+async def _postgres_plans(url):
+    engine = create_async_engine(url)
+    plans = {}
+    async with engine.begin() as conn:
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, stmt in QUERIES.items():
+            rows = await conn.execute(text("EXPLAIN " + _compile(engine, stmt)))
+            plans[name] = [row[0] for row in rows]
+    await engine.dispose()
+    return plans
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_sqlite_queries_use_indexes(name):
+    plan = asyncio.run(_sqlite_plans())[name]
+    scans = [step for step in plan if step.startswith(("SCAN", "SEARCH"))]
+    assert scans, plan
+    for step in scans:
+        assert "INDEX" in step, f"{name} falls back to a table scan: {plan}"
+    assert not any("TEMP B-TREE" in step for step in plan), f"{name} sorts in memory: {plan}"
+
+
+async def _create_or_drop_database(url, statement):
+    engine = create_async_engine(url, isolation_level="AUTOCOMMIT")
+    async with engine.connect() as conn:
+        await conn.execute(text(statement))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def migrated_postgres():
+    """A scratch database on the DATABASE_URL server, at alembic head."""
+    url = os.environ["DATABASE_URL"]
+    name = f"query_plans_{uuid.uuid4().hex[:8]}"
+    asyncio.run(_create_or_drop_database(url, f"CREATE DATABASE {name}"))
+    scratch = make_url(url).set(database=name).render_as_string(hide_password=False)
+    try:
+        # configparser interpolation: a literal % has to be doubled
+        command.upgrade(alembic_config(scratch.replace("%", "%%")), "head")
+        yield scratch
+    finally:
+        asyncio.run(_create_or_drop_database(url, f"DROP DATABASE IF EXISTS {name}"))
+
+
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"),
+    reason="DATABASE_URL does not point at Postgres",
+)
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_postgres_queries_use_indexes(name, migrated_postgres):
+    plan = asyncio.run(_postgres_plans(migrated_postgres))[name]
+    assert not any("Seq Scan" in step for step in plan), f"{name} falls back to a seq scan: {plan}"
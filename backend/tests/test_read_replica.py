@@ -0,0 +1,75 @@
+"""
+Read-replica routing against a local two-database setup.
+
+Two separate SQLite files stand in for primary and replica. Rows are
+written to only one of them, so each response shows which database served
+it.
+"""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from main import app
+from app import database
+from app.database import Base, ReplicaRouter, get_read_db
+from app.db_models import LeaderboardEntry
+
+
+@pytest.fixture
+def two_databases(tmp_path, monkeypatch):
+    engines = {
+        name: create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        for name in ("primary", "replica")
+    }
+    factories = {
+        name: sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        for name, engine in engines.items()
+    }
+
+    async def setup():
+        for name, engine in engines.items():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with factories[name]() as session:
+                session.add(LeaderboardEntry(id=name, user_id=name, username=f"on-{name}", score=1))
+                await session.commit()
+    asyncio.run(setup())
+
+    router = ReplicaRouter(factories["primary"], factories["replica"], max_lag=5, check_interval=0)
+    monkeypatch.setattr(database, "read_router", router)
+    # Use the real read dependency instead of the test-suite override
+    monkeypatch.delitem(app.dependency_overrides, get_read_db, raising=False)
+    yield router
+
+    async def teardown():
+        for engine in engines.values():
+            await engine.dispose()
+    asyncio.run(teardown())
+
+
+def served_by(client):
+    return client.get("/leaderboard").json()[0]["username"]
+
+
+def test_reads_go_to_replica_when_fresh(two_databases):
+    assert served_by(TestClient(app)) == "on-replica"
+
+
+def test_reads_fall_back_to_primary_when_replica_lags(two_databases):
+    async def lagging():
+        return 30.0
+    two_databases.measure_lag = lagging
+    assert served_by(TestClient(app)) == "on-primary"
+
+
+def test_reads_fall_back_to_primary_when_replica_unreachable(two_databases):
+    async def unreachable():
+        raise ConnectionError("replica down")
+    two_databases.measure_lag = unreachable
+    assert served_by(TestClient(app)) == "on-primary"
+
+
+def test_no_replica_configured_uses_primary():
+    router = ReplicaRouter("primary-factory")
+    assert asyncio.run(router.pick()) == "primary-factory"
@@ -0,0 +1,106 @@
+"""
+The synthetic data seeder, run against a throwaway SQLite file, and through
+COPY when DATABASE_URL points at Postgres (as in CI).
+"""
+import asyncio
+import os
+import time
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from main import app
+from app.database import Base, get_db
+from app.db_models import GameSession, LeaderboardEntry, User
+import seed
+
+
+def test_seeded_rows_load_and_users_can_log_in(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'seed.db'}"
+    args = seed.parse_args([
+        "--database-url", url, "--users", "300", "--scores-per-user", "4",
+        "--sessions-per-user", "2", "--active-fraction", "0.5", "--batch-size", "128",
+        "--score-dist", "pareto", "--seed", "7",
+    ])
+    counts = asyncio.run(seed.seed(args))
+    assert counts["users"] == 300
+    # Geometric counts around the requested means
+    assert 600 < counts["leaderboard"] < 1800
+    assert 250 < counts["game_sessions"] < 1000
+
+    engine = create_async_engine(url)
+    SeededSession = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def check():
+        async with SeededSession() as db:
+            top = (await db.execute(
+                select(LeaderboardEntry).order_by(LeaderboardEntry.score.desc()).limit(1)
+            )).scalar_one()
+            assert top.score % 10 == 0 and top.created_at is not None
+            active = await db.scalar(select(func.count()).where(GameSession.is_active))
+            assert 0 < active < counts["game_sessions"]
+            session = (await db.execute(select(GameSession).limit(1))).scalar_one()
+            assert len(session.snake) == 3 and set(session.food) == {"x", "y"}
+            # The schema came from the migrations, so the app's start-up upgrade is a no-op
+            assert await db.scalar(text("SELECT version_num FROM alembic_version"))
+            # Indexes were rebuilt after loading
+            indexes = await db.scalar(text("SELECT count(*) FROM sqlite_master WHERE name LIKE 'ix_%'"))
+            assert indexes == sum(len(table.indexes) for table in Base.metadata.sorted_tables)
+            return await db.scalar(select(User.email).limit(1))
+    email = asyncio.run(check())
+
+    async def override_get_db():
+        async with SeededSession() as session:
+            yield session
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        response = TestClient(app).post("/auth/login", json={"email": email, "password": "password123"})
+    finally:
+        app.dependency_overrides[get_db] = previous
+        asyncio.run(engine.dispose())
+    assert response.status_code == 200
+
+
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"),
+    reason="DATABASE_URL does not point at Postgres",
+)
+def test_postgres_copy_load(capsys):
+    url = os.environ["DATABASE_URL"]
+    prefix = f"seed{uuid.uuid4().hex[:8]}_"
+    args = seed.parse_args([
+        "--database-url", url, "--users", "20000", "--scores-per-user", "5",
+        "--sessions-per-user", "2", "--batch-size", "5000", "--prefix", prefix,
+    ])
+    started = time.perf_counter()
+    counts = asyncio.run(seed.seed(args))
+    elapsed = time.perf_counter() - started
+    with capsys.disabled():
+        print(f"\nseed.py COPY: {sum(counts.values())} rows in {elapsed:.1f}s "
+              f"({sum(counts.values()) / elapsed:,.0f} rows/s)")
+
+    async def check_and_clean_up():
+        engine = create_async_engine(url)
+        try:
+            async with engine.begin() as conn:
+                user_ids = select(User.id).where(User.username.startswith(prefix))
+                assert await conn.scalar(select(func.count()).select_from(user_ids.subquery())) == counts["users"]
+                loaded = await conn.scalar(
+                    select(func.count()).select_from(LeaderboardEntry).where(LeaderboardEntry.user_id.in_(user_ids))
+                )
+                assert loaded == counts["leaderboard"]
+                # COPY took the pre-serialized JSON and aware timestamps as-is
+                snake, started_at = (await conn.execute(
+                    select(GameSession.snake, GameSession.started_at).where(GameSession.user_id.in_(user_ids)).limit(1)
+                )).one()
+                assert len(snake) == 3 and started_at.tzinfo is not None
+
+                await conn.execute(delete(GameSession).where(GameSession.user_id.in_(user_ids)))
+                await conn.execute(delete(LeaderboardEntry).where(LeaderboardEntry.user_id.in_(user_ids)))
+                await conn.execute(delete(User).where(User.username.startswith(prefix)))
+        finally:
+            await engine.dispose()
+    asyncio.run(check_and_clean_up())
@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db
 from app import db_models
 
 # Use in-memory SQLite for integration testing
@@ -29,6 +29,7 @@ async def override_get_db():
         yield session
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 client = TestClient(app)
 
@@ -17,6 +17,8 @@ FRONTEND_PID=$!
 # Start FastAPI backend
 echo "Starting FastAPI backend..."
 cd /app/backend
+echo "Applying database migrations..."
+alembic upgrade head
 uvicorn main:app --host 0.0.0.0 --port 8000 &
 BACKEND_PID=$!
 
@@ -4,10 +4,11 @@ import { useState, useEffect, useCallback, useRef } from "react"
 import { GameBoard } from "./game-board"
 import { Button } from "@/components/ui/button"
 import { Card } from "@/components/ui/card"
-import type { Direction } from "@/lib/api/types"
+import type { Direction, GameSession } from "@/lib/api/types"
 import { initialGameState, updateGameState, isValidDirectionChange, type GameState } from "@/lib/game/game-engine"
 import { useAuth } from "@/lib/hooks/use-auth"
 import { leaderboardApi, gameSessionApi } from "@/lib/api/mock-api"
+import { ApiError } from "@/lib/api/config"
 import { useToast } from "@/hooks/use-toast"
 import { Play, Pause, RotateCcw } from "lucide-react"
 
@@ -18,6 +19,10 @@ export function SnakeGame() {
   const [isPlaying, setIsPlaying] = useState(false)
   const gameLoopRef = useRef<NodeJS.Timeout | null>(null)
   const sessionIdRef = useRef<string | null>(null)
+  // Session version from the last PATCH; ticks go out one at a time
+  const versionRef = useRef<number | undefined>(undefined)
+  const publishingRef = useRef(false)
+  const pendingTickRef = useRef<Partial<GameSession> | null>(null)
   const { user } = useAuth()
   const { toast } = useToast()
 
@@ -93,6 +98,47 @@ export function SnakeGame() {
     }
   }, [isPlaying, gameState.isGameOver, gameState.isPaused, user])
 
+  const sendTick = async (sessionId: string, tick: Partial<GameSession>) => {
+    publishingRef.current = true
+    try {
+      const session = await gameSessionApi.updateSession(sessionId, { ...tick, version: versionRef.current })
+      versionRef.current = session.version
+    } catch (error) {
+      if (error instanceof ApiError && error.status === 409) {
+        // Stale: drop the tick, the next one goes out with the current version
+        versionRef.current = error.detail?.version
+      } else {
+        console.error("[v0] Failed to publish tick:", error)
+      }
+    } finally {
+      publishingRef.current = false
+    }
+
+    // Only the newest tick that arrived meanwhile is worth sending
+    const next = pendingTickRef.current
+    pendingTickRef.current = null
+    if (next && sessionIdRef.current === sessionId) {
+      sendTick(sessionId, next)
+    }
+  }
+
+  // Publish each tick so spectators follow the real game
+  useEffect(() => {
+    if (!isPlaying || gameState.isGameOver || !sessionIdRef.current) return
+
+    const tick = {
+      snake: gameState.snake,
+      food: gameState.food,
+      direction: gameState.direction,
+      score: gameState.score,
+    }
+    if (publishingRef.current) {
+      pendingTickRef.current = tick
+    } else {
+      sendTick(sessionIdRef.current, tick)
+    }
+  }, [gameState.snake])
+
   const handleGameOver = async (finalScore: number) => {
     if (!user || !sessionIdRef.current) return
 
@@ -118,6 +164,8 @@ export function SnakeGame() {
       try {
         const session = await gameSessionApi.createSession(user.id, user.username)
         sessionIdRef.current = session.id
+        versionRef.current = session.version
+        pendingTickRef.current = null
       } catch (error) {
         console.error("[v0] Failed to create session:", error)
         toast({
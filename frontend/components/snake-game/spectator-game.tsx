@@ -5,52 +5,57 @@ import { GameBoard } from "./game-board"
 import { Card } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
 import type { GameSession } from "@/lib/api/types"
-import { updateGameState, getAIDirection, type GameState } from "@/lib/game/game-engine"
+import { gameSessionApi } from "@/lib/api/mock-api"
 import { Eye } from "lucide-react"
 
-const SPECTATOR_SPEED = 150 // ms per tick
+const SPECTATOR_SPEED = 150 // ms between snapshot polls
 
 interface SpectatorGameProps {
   session: GameSession
 }
 
 export function SpectatorGame({ session }: SpectatorGameProps) {
-  const [gameState, setGameState] = useState<GameState>({
-    snake: session.snake,
-    food: session.food,
-    direction: session.direction,
-    nextDirection: session.direction,
-    score: session.score,
-    isGameOver: false,
-    isPaused: false,
-  })
+  const [liveSession, setLiveSession] = useState<GameSession>(session)
+  // Last sequence number applied; undefined until the first keyframe arrives
+  const seqRef = useRef<number | undefined>(undefined)
+  const pollingRef = useRef(false)
 
-  const gameLoopRef = useRef<NodeJS.Timeout | null>(null)
-
-  // Simulate AI playing
+  // Follow the real game: keyframe on join, then only the deltas we missed
   useEffect(() => {
-    gameLoopRef.current = setInterval(() => {
-      setGameState((prev) => {
-        if (prev.isGameOver) return prev
+    let cancelled = false
 
-        // AI determines next direction
-        const aiDirection = getAIDirection(prev.snake, prev.food, prev.direction)
+    const poll = async () => {
+      if (pollingRef.current) return
+      pollingRef.current = true
+      try {
+        const snapshot = await gameSessionApi.getSnapshot(session.id, seqRef.current)
+        if (cancelled) return
 
-        const stateWithAI = {
-          ...prev,
-          nextDirection: aiDirection,
-        }
+        setLiveSession((prev) => {
+          let next = snapshot.keyframe ? snapshot.keyframe.state : prev
+          for (const delta of snapshot.deltas) {
+            next = { ...next, ...delta.changes }
+          }
+          return next
+        })
+        seqRef.current = snapshot.seq
+      } catch (error) {
+        console.error("[v0] Failed to fetch session snapshot:", error)
+      } finally {
+        pollingRef.current = false
+      }
+    }
 
-        return updateGameState(stateWithAI)
-      })
-    }, SPECTATOR_SPEED)
+    poll()
+    const interval = setInterval(poll, SPECTATOR_SPEED)
 
     return () => {
-      if (gameLoopRef.current) {
-        clearInterval(gameLoopRef.current)
-      }
+      cancelled = true
+      clearInterval(interval)
     }
-  }, [])
+  }, [session.id])
+
+  const isGameOver = !liveSession.isActive
 
   return (
     <Card className="p-6 space-y-4">
@@ -66,16 +71,16 @@ export function SpectatorGame({ session }: SpectatorGameProps) {
         </div>
         <div className="text-right">
           <p className="text-sm text-muted-foreground">Score</p>
-          <p className="text-2xl font-bold">{gameState.score}</p>
+          <p className="text-2xl font-bold">{liveSession.score}</p>
         </div>
       </div>
 
-      <GameBoard snake={gameState.snake} food={gameState.food} isGameOver={gameState.isGameOver} />
+      <GameBoard snake={liveSession.snake} food={liveSession.food} isGameOver={isGameOver} />
 
-      {gameState.isGameOver && (
+      {isGameOver && (
         <div className="text-center p-4 bg-muted rounded-lg">
           <p className="text-lg font-semibold">Game Ended</p>
-          <p className="text-sm text-muted-foreground">Final Score: {gameState.score}</p>
+          <p className="text-sm text-muted-foreground">Final Score: {liveSession.score}</p>
         </div>
       )}
     </Card>
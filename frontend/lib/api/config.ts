@@ -4,6 +4,17 @@ export const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL ||
         ? "http://localhost:8000"
         : "/api")
 
+// Dispatched on window when the server rejects the stored token
+export const AUTH_EXPIRED_EVENT = "auth-expired"
+
+// Non-2xx response; `detail` is the body's `detail` field, which is not always a string
+export class ApiError extends Error {
+    constructor(public status: number, public detail: any) {
+        super(typeof detail === "string" ? detail : detail?.message || `API Error: ${status}`)
+        this.name = "ApiError"
+    }
+}
+
 export async function fetchApi<T>(path: string, options: RequestInit = {}): Promise<T> {
     const url = `${API_BASE_URL}${path}`
 
@@ -29,10 +40,17 @@ export async function fetchApi<T>(path: string, options: RequestInit = {}): Prom
     })
     console.log(`[API] ${response.status} ${path}`)
 
+    // A rejected token (expired, revoked, or from before a server upgrade):
+    // forget it and let useAuth send the user back to login
+    if (response.status === 401 && typeof window !== 'undefined' && !path.startsWith("/auth/login") && !path.startsWith("/auth/signup")) {
+        localStorage.removeItem('snake_game_token')
+        window.dispatchEvent(new CustomEvent(AUTH_EXPIRED_EVENT))
+    }
+
     // Handle errors
     if (!response.ok) {
         const errorData = await response.json().catch(() => ({}))
-        throw new Error(errorData.detail || `API Error: ${response.statusText}`)
+        throw new ApiError(response.status, errorData.detail || `API Error: ${response.statusText}`)
     }
 
     // Handle empty responses (like 204)
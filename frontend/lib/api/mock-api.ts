@@ -1,7 +1,7 @@
 // Real API implementation
 // Replaces the mock API with actual backend calls
 
-import type { User, LoginRequest, SignupRequest, AuthResponse, LeaderboardEntry, GameSession, Position } from "./types"
+import type { User, LoginRequest, SignupRequest, AuthResponse, LeaderboardEntry, GameSession, Position, SpectatorSnapshot, PlayerStats } from "./types"
 import { fetchApi } from "./config"
 
 // Helper to save/load token
@@ -78,6 +78,13 @@ export const leaderboardApi = {
   },
 }
 
+// Player statistics
+export const userApi = {
+  async getStats(userId: string): Promise<PlayerStats> {
+    return fetchApi<PlayerStats>(`/users/${userId}/stats`)
+  },
+}
+
 // Game Sessions API (for spectator mode)
 export const gameSessionApi = {
   async getActiveSessions(): Promise<GameSession[]> {
@@ -88,6 +95,12 @@ export const gameSessionApi = {
     return fetchApi<GameSession>(`/sessions/${sessionId}`)
   },
 
+  // Keyframe + deltas since `since` (or the latest keyframe when omitted)
+  async getSnapshot(sessionId: string, since?: number): Promise<SpectatorSnapshot> {
+    const params = since === undefined ? "" : `?${new URLSearchParams({ since: since.toString() })}`
+    return fetchApi<SpectatorSnapshot>(`/sessions/${sessionId}/snapshot${params}`)
+  },
+
   async createSession(userId: string, username: string): Promise<GameSession> {
     return fetchApi<GameSession>('/sessions', {
       method: 'POST',
@@ -31,6 +31,21 @@ export interface LeaderboardEntry {
   rank: number
 }
 
+export interface PlayerStats {
+  userId: string
+  username: string
+  gamesPlayed: number
+  bestScore: number
+  averageScore: number
+  sessionsPlayed: number
+  totalPlaytimeSeconds: number
+  recentScores: number[]
+  recentAverage: number
+  // Recent average minus overall average: positive while improving
+  trend: number
+  lastPlayedAt: string | null
+}
+
 export interface GameSession {
   id: string
   userId: string
@@ -41,6 +56,20 @@ export interface GameSession {
   food: Position
   direction: Direction
   startedAt: string
+  version?: number
+}
+
+export interface SessionDelta {
+  seq: number
+  changes: Partial<GameSession>
+}
+
+export interface SpectatorSnapshot {
+  sessionId: string
+  seq: number
+  // Omitted when the requested `since` is still covered by the delta buffer
+  keyframe: { seq: number; state: GameSession } | null
+  deltas: SessionDelta[]
 }
 
 export interface Position {
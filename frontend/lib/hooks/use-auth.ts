@@ -4,6 +4,7 @@ import { create } from "zustand"
 import { persist } from "zustand/middleware"
 import type { User } from "@/lib/api/types"
 import { authApi } from "@/lib/api/mock-api"
+import { AUTH_EXPIRED_EVENT } from "@/lib/api/config"
 
 interface AuthState {
   user: User | null
@@ -99,3 +100,14 @@ export const useAuth = create<AuthState>()(
     },
   ),
 )
+
+// The stored token was rejected: drop the persisted session and ask for a
+// fresh login instead of failing every request with 401
+if (typeof window !== "undefined") {
+  window.addEventListener(AUTH_EXPIRED_EVENT, () => {
+    useAuth.setState({ user: null, token: null, isAuthenticated: false, isLoading: false })
+    if (!window.location.pathname.startsWith("/auth/login")) {
+      window.location.assign("/auth/login")
+    }
+  })
+}